@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+디스크립터 테이블 파싱 벤치마크
+
+기존 필드별 struct.unpack 루프와 iter_unpack(stdlib) / NumPy 경로를 비교한다.
+새 경로는 이름을 지연 디코딩하므로 파싱만 한 시간과 이름까지 디코딩한 시간을 따로 보고한다.
+
+    python bench_descriptors.py [엔트리 수 ...]
+"""
+import struct
+import sys
+import time
+
+import brarchive
+from brarchive import (
+    MAGIC, ENTRY_NAME_LEN_MAX, HEADER_SIZE, DESCRIPTOR_SIZE,
+    _numpy, _parse_descriptors_numpy, _parse_descriptors_struct,
+)
+
+
+def make_table(count):
+    """count개의 디스크립터를 가진 헤더+테이블 버퍼 생성 (콘텐츠 없음)"""
+    buf = bytearray(struct.pack('<QII', MAGIC, count, 1))
+    for i in range(count):
+        name = f"textures/blocks/block_{i:06d}.png".encode('utf-8')
+        buf.append(len(name))
+        buf.extend(name.ljust(ENTRY_NAME_LEN_MAX, b'\0'))
+        buf.extend(struct.pack('<II', i * 100, 100))
+    return bytes(buf)
+
+def parse_legacy(data, start, count):
+    """기존 방식: 필드마다 struct.unpack + 이름 즉시 디코딩"""
+    entries = []
+    offset = start
+    for i in range(count):
+        name_len = struct.unpack('<B', data[offset:offset+1])[0]
+        if name_len > ENTRY_NAME_LEN_MAX:
+            raise ValueError(f"Entry name too long: {name_len}")
+        name = data[offset+1:offset+1+name_len].decode('utf-8')
+        contents_offset = struct.unpack('<I', data[offset+1+ENTRY_NAME_LEN_MAX:offset+1+ENTRY_NAME_LEN_MAX+4])[0]
+        contents_len = struct.unpack('<I', data[offset+1+ENTRY_NAME_LEN_MAX+4:offset+1+ENTRY_NAME_LEN_MAX+8])[0]
+        entries.append((name, contents_offset, contents_len))
+        offset += DESCRIPTOR_SIZE
+    return entries
+
+def best_of(func, repeat=5):
+    """repeat번 실행 중 최소 시간 (초)"""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main(argv):
+    counts = [int(a) for a in argv] or [1_000, 10_000, 100_000]
+    np = _numpy()
+
+    # 기존 방식은 이름을 바로 디코딩하므로, 새 경로는 파싱만 한 경우와
+    # 전체 이름까지 디코딩한 경우(names())를 나눠서 비교
+    print(f"{'entries':>10} {'':>12} {'legacy':>10} {'struct':>10} {'numpy':>10} {'speedup':>14}")
+    for count in counts:
+        data = make_table(count)
+        view = memoryview(data)
+        legacy = best_of(lambda: parse_legacy(data, HEADER_SIZE, count))
+
+        for label, decode in (('parse only', False), ('+ names', True)):
+            def run(parse, *prefix):
+                table = parse(*prefix, view, HEADER_SIZE, count)
+                if decode:
+                    table.names()
+
+            fast = best_of(lambda: run(_parse_descriptors_struct))
+            row = f"{count:>10,} {label:>12} {legacy * 1e3:>8.2f}ms {fast * 1e3:>8.2f}ms"
+
+            if np is not None:
+                vec = best_of(lambda: run(_parse_descriptors_numpy, np))
+                row += f" {vec * 1e3:>8.2f}ms {legacy / fast:>5.1f}x/{legacy / vec:>6.1f}x"
+            else:
+                row += f" {'-':>10} {legacy / fast:>5.1f}x/{'-':>6}"
+            print(row)
+
+    print(f"\nNumPy 경로 사용 기준: 이미 임포트됐거나 {brarchive.NUMPY_MIN_ENTRIES:,}개 이상")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,2228 @@
+#!/usr/bin/env python3
+"""
+brarchive 포맷 읽기/쓰기 모듈 및 명령줄 도구 (Streamlit 의존성 없음)
+
+    python -m brarchive info archive.brarchive
+    python -m brarchive list archive.brarchive
+    python -m brarchive extract archive.brarchive -o out/
+    python -m brarchive encode folder/ -o archive.brarchive
+    python -m brarchive cat archive.brarchive manifest.json
+    python -m brarchive scan packs/ --format csv
+"""
+import argparse
+import bisect
+import collections
+import csv
+import glob
+import hashlib
+import io
+import json
+import mmap
+import operator
+import os
+import re
+import struct
+import sys
+import tempfile
+import time
+import zipfile
+import zlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+# brarchive 상수
+MAGIC = 0x267052A0B125277D
+ENTRY_NAME_LEN_MAX = 247
+VERSIONS = [1]
+HEADER_SIZE = 16
+DESCRIPTOR_SIZE = 1 + ENTRY_NAME_LEN_MAX + 8
+
+# 미리 컴파일한 구조체 (magic, entries, version) / (name_len, name, offset, length)
+HEADER_STRUCT = struct.Struct('<QII')
+DESCRIPTOR_STRUCT = struct.Struct(f'<B{ENTRY_NAME_LEN_MAX}sII')
+# 이름 필드를 건너뛰는 버전 (대량 파싱 시 이름 bytes 객체를 만들지 않음)
+DESCRIPTOR_SKIP_NAME_STRUCT = struct.Struct(f'<B{ENTRY_NAME_LEN_MAX}xII')
+
+# 인코딩 시 콘텐츠를 복사하는 단위
+COPY_CHUNK_SIZE = 1024 * 1024
+# 오프셋/길이 필드(u32)가 표현할 수 있는 최대값
+U32_MAX = 0xFFFFFFFF
+
+# ZIP으로 내보낼 때 이미 압축된 형식은 다시 압축하지 않고 저장(ZIP_STORED)
+ZIP_STORED_EXTENSIONS = frozenset([
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.ogg', '.mp3', '.fsb',
+    '.zip', '.gz', '.7z', '.mcpack', '.mcworld', '.brarchive',
+])
+ZIP_DEFAULT_LEVEL = 6
+# 이보다 큰 엔트리는 병렬 압축하지 않고 스트리밍 (압축 결과를 메모리에 올리지 않음)
+ZIP_PARALLEL_MAX_ENTRY = 64 * 1024 * 1024
+# 병렬 압축 중인 엔트리 원본 크기 합의 상한 (CPU 수와 관계없이 압축 결과 메모리를 제한)
+ZIP_PARALLEL_MAX_PENDING = 128 * 1024 * 1024
+
+# NumPy가 아직 임포트되지 않았다면 이 개수 이상일 때만 임포트해서 사용
+# (작은 테이블은 NumPy 임포트 비용이 stdlib 파싱 시간보다 큼)
+NUMPY_MIN_ENTRIES = 50_000
+
+# 패치 파일 형식: 매직, (이전 크기, 이전 헤더+테이블 다이제스트, 새 크기, 압축된 새 헤더+테이블 길이),
+# 압축된 새 헤더+테이블, 연산 목록(새 콘텐츠 영역 순서), 종료 연산 + 새 아카이브 전체 다이제스트
+PATCH_MAGIC = b'BRPATCH\x01'
+PATCH_HEADER_STRUCT = struct.Struct('<Q32sQQ')
+# 연산: (종류, a, b) - COPY는 이전 아카이브의 a(절대 오프셋)부터 b바이트, LITERAL은 뒤따르는 a바이트
+PATCH_OP_STRUCT = struct.Struct('<BQQ')
+PATCH_OP_END, PATCH_OP_COPY, PATCH_OP_LITERAL = 0, 1, 2
+# 블록 델타의 블록 크기와, 블록 델타를 시도할 최소 엔트리 크기
+PATCH_BLOCK_SIZE = 4096
+PATCH_DELTA_MIN = 64 * 1024
+# 블록 델타에서 약한 체크섬을 한 번에 계산할 위치 수 (NumPy)
+PATCH_DELTA_WINDOW = 1024 * 1024
+
+
+def read_header(data, offset=0):
+    """헤더 읽기"""
+    if len(data) < offset + HEADER_SIZE:
+        raise ValueError(f"Truncated header: need {HEADER_SIZE} bytes, got {len(data) - offset}")
+
+    magic, entries, version = HEADER_STRUCT.unpack_from(data, offset)
+    if magic != MAGIC:
+        raise ValueError(f"Magic mismatch: expected {hex(MAGIC)}, got {hex(magic)}")
+
+    if version not in VERSIONS:
+        raise ValueError(f"Unsupported version: {version}")
+
+    return entries, version, offset + HEADER_SIZE
+
+_numpy_module = None
+
+def _numpy():
+    """NumPy 지연 임포트 (설치되지 않았으면 None)"""
+    global _numpy_module
+    if _numpy_module is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy_module = numpy
+    return _numpy_module or None
+
+
+class DescriptorTable:
+    """파싱된 엔트리 디스크립터 테이블
+
+    오프셋/길이는 배열로 보관하고, 이름은 처음 요청될 때 디코딩한다.
+    """
+
+    def __init__(self, view, start, name_lens, offsets, lengths):
+        self._view = view
+        self._start = start
+        self.name_lens = name_lens
+        self.offsets = offsets
+        self.lengths = lengths
+        self._names = [None] * len(offsets)
+
+    def __len__(self):
+        return len(self._names)
+
+    def name(self, i):
+        """i번째 엔트리 이름 (지연 디코딩)"""
+        name = self._names[i]
+        if name is None:
+            pos = self._start + i * DESCRIPTOR_SIZE + 1
+            name = bytes(self._view[pos:pos + int(self.name_lens[i])]).decode('utf-8')
+            self._names[i] = name
+        return name
+
+    def names(self):
+        """전체 엔트리 이름 목록"""
+        return [self.name(i) for i in range(len(self))]
+
+
+def _descriptor_dtype(np):
+    """디스크립터 1개(256 bytes)에 대응하는 구조화 dtype"""
+    return np.dtype([
+        ('name_len', 'u1'),
+        ('name', f'S{ENTRY_NAME_LEN_MAX}'),
+        ('offset', '<u4'),
+        ('length', '<u4'),
+    ])
+
+def _parse_descriptors_numpy(np, view, start, count):
+    """디스크립터 영역 전체를 구조화 배열로 보고 한 번에 파싱"""
+    records = np.frombuffer(view, dtype=_descriptor_dtype(np), count=count, offset=start)
+    name_lens = records['name_len']
+
+    too_long = np.flatnonzero(name_lens > ENTRY_NAME_LEN_MAX)
+    if len(too_long):
+        raise ValueError(f"Entry name too long: {int(name_lens[too_long[0]])}")
+
+    return DescriptorTable(view, start, name_lens, records['offset'], records['length'])
+
+def _parse_descriptors_struct(view, start, count):
+    """iter_unpack으로 디스크립터 영역을 한 번에 파싱 (stdlib 전용)"""
+    if count == 0:
+        return DescriptorTable(view, start, (), (), ())
+
+    region = view[start:start + count * DESCRIPTOR_SIZE]
+    name_lens, offsets, lengths = zip(*DESCRIPTOR_SKIP_NAME_STRUCT.iter_unpack(region))
+
+    if max(name_lens) > ENTRY_NAME_LEN_MAX:
+        too_long = next(n for n in name_lens if n > ENTRY_NAME_LEN_MAX)
+        raise ValueError(f"Entry name too long: {too_long}")
+
+    return DescriptorTable(view, start, name_lens, offsets, lengths)
+
+def _check_table_bounds(view, start, count):
+    """디스크립터 테이블이 버퍼 안에 들어가는지 확인"""
+    end = start + count * DESCRIPTOR_SIZE
+    if len(view) < end:
+        raise ValueError(f"Truncated descriptor table: need {end} bytes, got {len(view)}")
+
+def parse_descriptors(view, start, count):
+    """디스크립터 테이블 파싱 (NumPy 또는 stdlib 경로 자동 선택)"""
+    _check_table_bounds(view, start, count)
+
+    np = _numpy() if count >= NUMPY_MIN_ENTRIES or 'numpy' in sys.modules else None
+    if np is not None:
+        return _parse_descriptors_numpy(np, view, start, count)
+    return _parse_descriptors_struct(view, start, count)
+
+def _descriptor_columns(np, view, start, count):
+    """검사 없이 디스크립터 영역을 (name_len, 오프셋, 길이) 열로 읽기"""
+    if np is not None:
+        records = np.frombuffer(view, dtype=_descriptor_dtype(np), count=count, offset=start)
+        return records['name_len'], records['offset'].astype('u8'), records['length'].astype('u8')
+    if count == 0:
+        return (), (), ()
+    return zip(*DESCRIPTOR_SKIP_NAME_STRUCT.iter_unpack(view[start:start + count * DESCRIPTOR_SIZE]))
+
+def _span_problems_numpy(np, offsets, lengths):
+    """오프셋순으로 정렬한 구간들의 겹침/틈을 한 번에 계산
+
+    (겹치는 엔트리, 겹쳐진 엔트리, 겹친 바이트), (틈 다음 엔트리, 틈 바이트) 목록과
+    가장 먼 엔트리 끝을 반환한다.
+    """
+    order = np.lexsort((lengths, offsets))
+    starts, ends = offsets[order], offsets[order] + lengths[order]
+    max_end = np.maximum.accumulate(ends)
+    # 지금까지 가장 먼 끝을 가진 엔트리 (정렬 순서 기준 위치)
+    holder = np.maximum.accumulate(np.where(ends == max_end, np.arange(len(order)), 0))
+    prev_end = np.concatenate(([0], max_end[:-1])).astype('u8')
+    prev_holder = np.concatenate(([0], holder[:-1]))
+
+    # 완전히 같은 구간(중복 제거로 공유된 내용)은 겹침으로 보지 않음
+    shared = (starts == starts[prev_holder]) & (ends == ends[prev_holder])
+    overlap = np.flatnonzero((starts < prev_end) & (lengths[order] > 0) & ~shared)
+    gap = np.flatnonzero(starts > prev_end)
+    overlaps = [(int(order[k]), int(order[prev_holder[k]]), int(min(prev_end[k], ends[k]) - starts[k]))
+                for k in overlap]
+    gaps = [(int(order[k]), int(starts[k] - prev_end[k])) for k in gap]
+    return overlaps, gaps, int(max_end[-1])
+
+def _span_problems_struct(offsets, lengths):
+    """_span_problems_numpy의 stdlib 버전"""
+    overlaps, gaps = [], []
+    prev_end, holder = 0, None
+    for i in sorted(range(len(offsets)), key=lambda i: (offsets[i], lengths[i])):
+        start, end = offsets[i], offsets[i] + lengths[i]
+        if holder is not None and start == offsets[holder] and end == prev_end:
+            pass  # 완전히 같은 구간(중복 제거로 공유된 내용)
+        elif start < prev_end and lengths[i]:
+            overlaps.append((i, holder, min(prev_end, end) - start))
+        elif start > prev_end:
+            gaps.append((i, start - prev_end))
+        if end >= prev_end:
+            prev_end, holder = end, i
+    return overlaps, gaps, prev_end
+
+def validate(data):
+    """아카이브 구조 전체 검사
+
+    헤더, 디스크립터 테이블 크기, 이름 길이, 콘텐츠 영역을 벗어나는 엔트리,
+    엔트리끼리 겹치는 구간(완전히 같은 구간을 공유하는 것은 허용), 어느 엔트리도
+    가리키지 않는 틈을 디스크립터 테이블 전체에 대해 한 번에 검사한다.
+    문제 목록 [(종류, 엔트리 인덱스, 메시지)]를 반환한다 (아카이브 전체에 대한
+    문제는 인덱스가 None).
+    """
+    view = memoryview(data).cast('B')
+    try:
+        count, version, start = read_header(view)
+    except ValueError as e:
+        return [('header', None, str(e))]
+
+    contents_start = start + count * DESCRIPTOR_SIZE
+    if contents_start > len(view):
+        return [('table', None, f"Truncated descriptor table: need {contents_start} bytes, got {len(view)}")]
+    contents_size = len(view) - contents_start
+
+    np = _numpy() if count >= NUMPY_MIN_ENTRIES or 'numpy' in sys.modules else None
+    name_lens, offsets, lengths = _descriptor_columns(np, view, start, count)
+
+    def label(i):
+        pos = start + i * DESCRIPTOR_SIZE
+        raw = bytes(view[pos + 1:pos + 1 + min(int(name_lens[i]), ENTRY_NAME_LEN_MAX)])
+        if name_lens[i] > ENTRY_NAME_LEN_MAX:
+            raw = raw.rstrip(b'\0')
+        return f"#{i} {raw.decode('utf-8', 'replace')!r}"
+
+    problems = []
+    if np is not None:
+        too_long = np.flatnonzero(name_lens > ENTRY_NAME_LEN_MAX).tolist()
+        out_of_range = np.flatnonzero(offsets + lengths > contents_size).tolist()
+    else:
+        too_long = [i for i, n in enumerate(name_lens) if n > ENTRY_NAME_LEN_MAX]
+        out_of_range = [i for i in range(count) if offsets[i] + lengths[i] > contents_size]
+
+    for i in too_long:
+        problems.append(('name_len', i, f"{label(i)}: name length {int(name_lens[i])} > {ENTRY_NAME_LEN_MAX}"))
+    for i in out_of_range:
+        problems.append(('out_of_range', i, f"{label(i)}: contents {int(offsets[i])}+{int(lengths[i])} "
+                                            f"end beyond contents region ({contents_size} bytes)"))
+    if not count:
+        return problems
+
+    if np is not None:
+        overlaps, gaps, end = _span_problems_numpy(np, offsets, lengths)
+    else:
+        overlaps, gaps, end = _span_problems_struct(offsets, lengths)
+    for i, other, size in overlaps:
+        problems.append(('overlap', i, f"{label(i)}: overlaps {label(other)} by {size} bytes"))
+    for i, size in gaps:
+        problems.append(('gap', i, f"{label(i)}: {size} unreferenced bytes before contents offset {int(offsets[i])}"))
+    if end < contents_size:
+        problems.append(('gap', None, f"{contents_size - end} unreferenced bytes at end of contents region"))
+    return problems
+
+
+class BRArchiveReader:
+    """brarchive 지연 로딩 리더
+
+    경로나 파일 객체는 mmap으로 열고, bytes/memoryview 등 버퍼와 BytesIO처럼
+    파일 디스크립터가 없는 객체는 복사 없이 그대로 사용한다. 엔트리 내용은 요청할 때마다 memoryview 슬라이스로
+    반환하므로 아카이브 크기 이상의 메모리를 쓰지 않는다.
+
+    디스크립터 테이블 전체는 처음 필요할 때 파싱한다. 이름으로 엔트리
+    하나를 찾을 때는 테이블이 정렬돼 있으면 이진 탐색으로 디스크립터만
+    몇 개 읽고, 정렬돼 있지 않으면 이름 해시 인덱스를 만든다.
+    """
+
+    def __init__(self, source):
+        self._file = None
+        self._mmap = None
+        self._fd = None
+
+        if isinstance(source, (str, os.PathLike)):
+            self._file = open(source, 'rb')
+            self._fd = self._file.fileno()
+            self._mmap = self._map_file(self._file)
+            buf = self._mmap
+        elif hasattr(source, 'fileno'):
+            try:
+                fd = source.fileno()
+            except (OSError, io.UnsupportedOperation):
+                # BytesIO(Streamlit UploadedFile 포함) 등 실제 파일이 아닌 객체는 버퍼로 사용
+                buf = source.getbuffer() if hasattr(source, 'getbuffer') else memoryview(source.read())
+            else:
+                # 호출자가 파일을 닫아도 같은 번호가 다른 파일을 가리키지 않도록 복제해서 소유
+                self._file = os.fdopen(os.dup(fd), 'rb')
+                self._fd = self._file.fileno()
+                self._mmap = self._map_file(self._file)
+                buf = self._mmap
+        else:
+            buf = source
+
+        try:
+            self._view = memoryview(buf).cast('B')
+            self.archive_size = len(self._view)
+            self.entries_count, self.version, offset = read_header(self._view)
+            _check_table_bounds(self._view, offset, self.entries_count)
+
+            # 콘텐츠 영역 시작 위치 (디스크립터들 뒤)
+            self.contents_start = offset + self.entries_count * DESCRIPTOR_SIZE
+            self._table = None
+            self._sorted = None
+            self._index = None
+            self._path_index = None
+            self._directory_stats = None
+        except Exception:
+            self.close()
+            raise
+
+    @staticmethod
+    def _map_file(f):
+        """파일 전체를 읽기 전용으로 mmap"""
+        # 빈 파일은 mmap할 수 없으므로 빈 버퍼로 대체 (헤더 검사에서 오류 발생)
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """mmap과 파일 핸들 해제"""
+        self._table = None
+        view = getattr(self, '_view', None)
+        if view is not None:
+            try:
+                view.release()
+            except BufferError:
+                # 디스크립터 배열 등이 아직 참조 중이면 GC에 맡김
+                pass
+            self._view = None
+        if isinstance(self._mmap, mmap.mmap):
+            try:
+                self._mmap.close()
+            except BufferError:
+                # 아직 사용 중인 memoryview 슬라이스가 있으면 GC에 맡김
+                pass
+        self._mmap = None
+        self._fd = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def table(self):
+        """디스크립터 테이블 (처음 접근할 때 파싱)"""
+        if self._table is None:
+            self._table = parse_descriptors(self._view, HEADER_SIZE, self.entries_count)
+        return self._table
+
+    def _descriptor_at(self, i):
+        """i번째 디스크립터의 (name_len, 오프셋, 길이)를 테이블 파싱 없이 읽기"""
+        if not 0 <= i < self.entries_count:
+            raise IndexError(i)
+        return DESCRIPTOR_SKIP_NAME_STRUCT.unpack_from(self._view, HEADER_SIZE + i * DESCRIPTOR_SIZE)
+
+    def _raw_name(self, i):
+        """i번째 엔트리 이름의 UTF-8 bytes (디코딩하지 않음)"""
+        pos = HEADER_SIZE + i * DESCRIPTOR_SIZE
+        name_len = self._view[pos]
+        if name_len > ENTRY_NAME_LEN_MAX:
+            raise ValueError(f"Entry name too long: {name_len}")
+        return bytes(self._view[pos + 1:pos + 1 + name_len])
+
+    def is_sorted(self):
+        """디스크립터가 이름(UTF-8 bytes) 순으로 정렬돼 있는지 (한 번만 검사)"""
+        count = self.entries_count
+        np = _numpy() if count >= NUMPY_MIN_ENTRIES or 'numpy' in sys.modules else None
+        if self._sorted is None and np is not None and count > 1:
+            # 이름 길이 뒤의 패딩을 0으로 지운 뒤 S247 배열로 인접 비교
+            raw = np.frombuffer(self._view, np.uint8, count * DESCRIPTOR_SIZE, HEADER_SIZE)
+            raw = raw.reshape(count, DESCRIPTOR_SIZE)
+            if int(raw[:, 0].max()) > ENTRY_NAME_LEN_MAX:
+                raise ValueError(f"Entry name too long: {int(raw[:, 0].max())}")
+            names = raw[:, 1:1 + ENTRY_NAME_LEN_MAX].copy()
+            names *= np.arange(ENTRY_NAME_LEN_MAX, dtype=np.uint8) < raw[:, :1]
+            names = names.view(f'S{ENTRY_NAME_LEN_MAX}').ravel()
+            self._sorted = bool((names[1:] >= names[:-1]).all())
+        elif self._sorted is None:
+            prev = b''
+            self._sorted = True
+            for i in range(self.entries_count):
+                name = self._raw_name(i)
+                if name < prev:
+                    self._sorted = False
+                    break
+                prev = name
+        return self._sorted
+
+    def lookup(self, name):
+        """이름으로 디스크립터 인덱스 찾기 (없으면 -1)
+
+        정렬된 테이블에서는 O(log n)번 디스크립터를 읽는 이진 탐색을 하고,
+        정렬되지 않은 테이블에서는 이름 해시 인덱스를 사용한다.
+        UTF-8 bytes 순서는 str 순서와 같으므로 encode_brarchive 출력은 항상 정렬돼 있다.
+        """
+        if not self.is_sorted():
+            return self._name_index().get(name, -1)
+
+        key = name.encode('utf-8')
+        lo, hi = 0, self.entries_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._raw_name(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.entries_count and self._raw_name(lo) == key:
+            return lo
+        return -1
+
+    def _find(self, name):
+        """lookup과 같지만 없으면 KeyError"""
+        i = self.lookup(name)
+        if i < 0:
+            raise KeyError(name)
+        return i
+
+    def fileno(self):
+        """경로나 파일 객체로 연 아카이브의 파일 디스크립터 (버퍼로 열었으면 None)
+
+        파일 객체로 열었으면 리더가 소유한 복제 디스크립터를 반환한다.
+        """
+        return self._fd
+
+    def _name_index(self):
+        """이름 -> 디스크립터 인덱스 (처음 필요할 때 생성)"""
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.table.names())}
+        return self._index
+
+    def path_index(self):
+        """정렬된 경로 인덱스 (처음 필요할 때 생성)"""
+        if self._path_index is None:
+            self._path_index = PathIndex(self.table.names(), self.table.offsets, self.table.lengths)
+        return self._path_index
+
+    def directory_stats(self):
+        """디렉토리별 집계 (처음 필요할 때 한 번 계산, directory_stats() 참고)"""
+        if self._directory_stats is None:
+            self._directory_stats = directory_stats(self.path_index())
+        return self._directory_stats
+
+    def __len__(self):
+        return self.entries_count
+
+    def __contains__(self, name):
+        return self.lookup(name) >= 0
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def names(self):
+        """엔트리 이름 목록 (디스크립터 순서)"""
+        return self.table.names()
+
+    def size(self, name):
+        """엔트리 크기 (내용을 읽지 않음)"""
+        return self._descriptor_at(self._find(name))[2]
+
+    def get_at(self, i):
+        """i번째 엔트리 내용을 memoryview 슬라이스로 반환"""
+        name_len, contents_offset, contents_len = self._descriptor_at(i)
+        actual_offset = self.contents_start + contents_offset
+        if actual_offset + contents_len > self.archive_size:
+            raise ValueError(f"Truncated contents: entry #{i} ends at {actual_offset + contents_len}, "
+                             f"beyond {self.archive_size} bytes")
+        return self._view[actual_offset:actual_offset + contents_len]
+
+    def get(self, name):
+        """엔트리 내용을 memoryview 슬라이스로 반환"""
+        return self.get_at(self._find(name))
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def check_bounds(self):
+        """모든 엔트리가 아카이브 안에 들어가는지 테이블 전체를 한 번에 확인 (벗어나면 ValueError)"""
+        _, end = table_extent(self.table)
+        if self.contents_start + end > self.archive_size:
+            kind, i, message = next(p for p in validate(self._view) if p[0] == 'out_of_range')
+            raise ValueError(f"Truncated contents: {message}")
+
+    def items(self):
+        """(이름, memoryview) 쌍을 순서대로 생성"""
+        for i in range(self.entries_count):
+            yield self.table.name(i), self.get_at(i)
+
+
+class PathIndex:
+    """정렬된 평면 경로 인덱스
+
+    엔트리 이름을 한 번 정렬해 두고 오프셋/길이를 같은 순서의 배열로 보관한다.
+    디렉토리의 하위 엔트리는 정렬 순서에서 연속 구간이므로 구간 찾기, 개수 세기,
+    접두사 검색은 bisect 두 번(O(log n))으로 끝난다.
+    경로 구분자는 '/'로 정규화하며, 디렉토리는 'a/b' 또는 'a/b/'로 지정한다.
+    """
+
+    def __init__(self, names, offsets=None, lengths=None):
+        paths = [name.replace('\\', '/') for name in names]
+        order = sorted(range(len(paths)), key=paths.__getitem__)
+
+        self.paths = [paths[i] for i in order]
+        self.names = [names[i] for i in order]
+        self.order = array('I', order)  # 정렬 위치 -> 디스크립터 인덱스
+        self.offsets = array('I', (int(offsets[i]) for i in order)) if offsets is not None else None
+        self.lengths = array('I', (int(lengths[i]) for i in order)) if lengths is not None else None
+
+    def __len__(self):
+        return len(self.paths)
+
+    @staticmethod
+    def _dir_prefix(directory):
+        """디렉토리 경로를 'a/b/' 형태의 접두사로 변환 (루트는 '')"""
+        directory = directory.replace('\\', '/').strip('/')
+        return directory + '/' if directory else ''
+
+    def prefix_range(self, prefix, lo=0, hi=None):
+        """prefix로 시작하는 경로들의 정렬 위치 구간 [lo, hi)"""
+        hi = len(self.paths) if hi is None else hi
+        start = bisect.bisect_left(self.paths, prefix, lo, hi)
+        if not prefix:
+            return start, hi
+        # prefix로 시작하는 모든 문자열보다 큰 최소 문자열
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return start, bisect.bisect_left(self.paths, upper, start, hi)
+
+    def dir_range(self, directory):
+        """디렉토리 아래(하위 디렉토리 포함) 엔트리들의 정렬 위치 구간 [lo, hi)"""
+        return self.prefix_range(self._dir_prefix(directory))
+
+    def find(self, path):
+        """경로의 정렬 위치 (없으면 -1)"""
+        path = path.replace('\\', '/')
+        pos = bisect.bisect_left(self.paths, path)
+        if pos < len(self.paths) and self.paths[pos] == path:
+            return pos
+        return -1
+
+    def is_dir(self, directory):
+        """하위 엔트리가 하나라도 있는 디렉토리인지"""
+        lo, hi = self.dir_range(directory)
+        return hi > lo
+
+    def count(self, directory=''):
+        """디렉토리 아래(하위 디렉토리 포함) 엔트리 수"""
+        lo, hi = self.dir_range(directory)
+        return hi - lo
+
+    def listdir(self, directory=''):
+        """디렉토리의 직속 자식 목록
+
+        (하위 디렉토리 이름 목록, 파일 정렬 위치 목록)을 반환한다.
+        하위 디렉토리 하나는 bisect 한 번으로 건너뛰므로 비용은 자식 수에 비례한다.
+        """
+        prefix = self._dir_prefix(directory)
+        lo, hi = self.prefix_range(prefix)
+        dirs, files = [], []
+        i = lo
+        while i < hi:
+            rest = self.paths[i][len(prefix):]
+            slash = rest.find('/')
+            if slash < 0:
+                files.append(i)
+                i += 1
+            else:
+                child = rest[:slash]
+                dirs.append(child)
+                i = self.prefix_range(prefix + child + '/', i, hi)[1]
+        return dirs, files
+
+
+def directory_stats(index):
+    """디렉토리별 총 바이트 수, 엔트리 수, 가장 큰 엔트리 집계
+
+    {디렉토리: {'bytes', 'entries', 'largest', 'largest_size'}}를 반환하며
+    루트는 ''이다. 각 엔트리는 직속 디렉토리에만 한 번 더하고, 그 결과를
+    깊은 디렉토리부터 부모로 올려 합치므로 엔트리당 비용은 경로 깊이와 무관하다.
+    """
+    stats = {}
+    for path, size in zip(index.paths, index.lengths):
+        parent = path.rpartition('/')[0]
+        entry = stats.get(parent)
+        if entry is None:
+            stats[parent] = {'bytes': size, 'entries': 1, 'largest': path, 'largest_size': size}
+            continue
+        entry['bytes'] += size
+        entry['entries'] += 1
+        if size > entry['largest_size']:
+            entry['largest'] = path
+            entry['largest_size'] = size
+
+    # 중간 디렉토리(직속 파일이 없는 디렉토리)도 채우기
+    for directory in list(stats):
+        while directory:
+            directory = directory.rpartition('/')[0]
+            if directory in stats:
+                break
+            stats[directory] = {'bytes': 0, 'entries': 0, 'largest': None, 'largest_size': -1}
+
+    # 깊은 디렉토리부터 부모로 합산
+    totals = {directory: dict(entry) for directory, entry in stats.items()}
+    for directory in sorted(stats, key=lambda d: d.count('/') if d else -1, reverse=True):
+        if not directory:
+            continue
+        entry = totals[directory]
+        parent = totals[directory.rpartition('/')[0]]
+        parent['bytes'] += entry['bytes']
+        parent['entries'] += entry['entries']
+        if entry['largest_size'] > parent['largest_size']:
+            parent['largest'] = entry['largest']
+            parent['largest_size'] = entry['largest_size']
+    return totals
+
+
+def pread(fd, size, offset):
+    """fd의 offset 위치에서 size 바이트 읽기 (짧은 읽기는 반복, EOF면 그만큼만)
+
+    os.pread가 없는 플랫폼(Windows)에서는 lseek + read로 대신한다.
+    """
+    chunks = []
+    while size > 0:
+        if hasattr(os, 'pread'):
+            chunk = os.pread(fd, size, offset)
+        else:
+            os.lseek(fd, offset, os.SEEK_SET)
+            chunk = os.read(fd, size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+        offset += len(chunk)
+    return chunks[0] if len(chunks) == 1 else b''.join(chunks)
+
+def find_descriptor(table, name):
+    """디스크립터 테이블 bytes에서 이름이 일치하는 디스크립터 인덱스 찾기 (없으면 -1)
+
+    이름을 디코딩하지 않고 (name_len, name) 바이트열을 bytes.find로 검색한 뒤
+    256바이트 경계에 맞는 위치만 인정한다.
+    """
+    key = name.encode('utf-8')
+    if len(key) > ENTRY_NAME_LEN_MAX:
+        return -1
+    needle = bytes([len(key)]) + key
+    pos = table.find(needle)
+    while pos >= 0:
+        if pos % DESCRIPTOR_SIZE == 0:
+            return pos // DESCRIPTOR_SIZE
+        pos = table.find(needle, pos + 1)
+    return -1
+
+def _pread_bisect(fd, start, count, name):
+    """정렬된 테이블이라고 가정하고 디스크립터를 pread로 하나씩 읽으며 이진 탐색
+
+    찾으면 (인덱스, 디스크립터 bytes), 못 찾으면 None (정렬되지 않은 테이블일 수도 있음)
+    """
+    key = name.encode('utf-8')
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        desc = pread(fd, DESCRIPTOR_SIZE, start + mid * DESCRIPTOR_SIZE)
+        if len(desc) < DESCRIPTOR_SIZE:
+            return None
+        probe = desc[1:1 + desc[0]]
+        if probe == key:
+            return mid, desc
+        if probe < key:
+            lo = mid + 1
+        else:
+            hi = mid
+    return None
+
+def read_entry(path, name):
+    """아카이브 전체를 열지 않고 엔트리 하나만 읽기
+
+    16바이트 헤더를 읽은 뒤 먼저 디스크립터를 pread로 O(log n)개만 읽는 이진
+    탐색을 시도하고(정렬된 아카이브), 못 찾으면 디스크립터 테이블 전체를 읽어
+    검색한다. 그다음 해당 엔트리의 바이트 구간만 pread로 읽는다.
+    pread는 요청 크기만큼 버퍼를 먼저 할당하므로, 테이블과 엔트리 구간이
+    파일 안에 있는지 먼저 확인한다. 엔트리가 없으면 KeyError가 발생한다.
+    """
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        size = os.fstat(fd).st_size
+        entries_count, version, offset = read_header(pread(fd, HEADER_SIZE, 0))
+        table_size = entries_count * DESCRIPTOR_SIZE
+        if offset + table_size > size:
+            raise ValueError(f"Truncated descriptor table: need {offset + table_size} bytes, got {size}")
+
+        found = _pread_bisect(fd, offset, entries_count, name)
+        if found is not None:
+            desc = found[1]
+        else:
+            table = pread(fd, table_size, offset)
+            if len(table) < table_size:
+                raise ValueError(f"Truncated descriptor table: need {offset + table_size} bytes, got {offset + len(table)}")
+            i = find_descriptor(table, name)
+            if i < 0:
+                raise KeyError(name)
+            desc = table[i * DESCRIPTOR_SIZE:(i + 1) * DESCRIPTOR_SIZE]
+        name_len, contents_offset, contents_len = DESCRIPTOR_SKIP_NAME_STRUCT.unpack_from(desc)
+        actual_offset = offset + table_size + contents_offset
+        if actual_offset + contents_len > size:
+            raise ValueError(f"Truncated contents: entry {name!r} ends at {actual_offset + contents_len}, "
+                             f"beyond {size} bytes")
+
+        contents = pread(fd, contents_len, actual_offset)
+        if len(contents) != contents_len:
+            raise ValueError(f"Truncated entry {name!r}: expected {contents_len} bytes, got {len(contents)}")
+        return contents
+    finally:
+        os.close(fd)
+
+
+def check_limits(reader, max_entries=None, max_total_size=None, max_entry_size=None):
+    """신뢰할 수 없는 아카이브를 본격적으로 읽기 전에 크기 제한 확인 (None인 제한은 검사하지 않음)
+
+    엔트리 수는 헤더만으로, 내용 합계와 엔트리별 크기는 디스크립터 테이블을 한 번에
+    훑어 확인한다. 아카이브 밖을 가리키는 엔트리도 여기서 거부한다. 초과하면 ValueError.
+    (디스크립터 테이블이 업로드 안에 들어가는지는 리더를 열 때 이미 확인됨)
+    """
+    if max_entries is not None and reader.entries_count > max_entries:
+        raise ValueError(f"Too many entries: {reader.entries_count:,} > {max_entries:,}")
+
+    table = reader.table
+    if max_entry_size is not None and len(table):
+        lengths = table.lengths
+        largest = int(lengths.max() if hasattr(lengths, 'max') else max(lengths))
+        if largest > max_entry_size:
+            raise ValueError(f"Entry too large: {largest:,} bytes > {max_entry_size:,}")
+    if max_total_size is not None:
+        total, _ = table_extent(table)
+        if total > max_total_size:
+            raise ValueError(f"Archive contents too large: {total:,} bytes > {max_total_size:,}")
+    reader.check_bounds()
+
+def deadline_after(seconds):
+    """지금부터 seconds초 뒤의 마감 시각 (None이면 마감 없음)"""
+    return None if seconds is None else time.monotonic() + seconds
+
+def check_deadline(deadline):
+    """마감 시각이 지났으면 TimeoutError"""
+    if deadline is not None and time.monotonic() > deadline:
+        raise TimeoutError("Time budget exceeded while processing archive")
+
+def decode_brarchive_to_dict(data, limits=None, deadline=None):
+    """brarchive 파일을 딕셔너리로 디코딩 (Rust 라이브러리와 동일한 로직)
+
+    limits는 check_limits()의 키워드 인자 딕셔너리로, 주면 엔트리를 읽기 전에 확인한다.
+    deadline(deadline_after() 결과)을 넘기면 엔트리마다 확인해 중단한다.
+    """
+    archive = BRArchiveReader(data)
+    check_limits(archive, **(limits or {}))
+    files_dict = {}
+    for name, contents in archive.items():
+        check_deadline(deadline)
+        files_dict[name] = bytes(contents)
+    return files_dict, archive.entries_count, archive.version
+
+def _open_archive(archive):
+    """경로/버퍼를 리더로 열기 (이미 리더면 그대로 사용)"""
+    if isinstance(archive, BRArchiveReader):
+        return archive
+    return BRArchiveReader(archive)
+
+def safe_entry_path(dest, name):
+    """엔트리 이름을 dest 아래의 경로로 변환 (절대 경로, '..' 거부)"""
+    parts = [part for part in name.replace('\\', '/').split('/') if part not in ('', '.')]
+    if not parts or '..' in parts or os.path.isabs(name) or ':' in parts[0]:
+        raise ValueError(f"Unsafe entry name: {name!r}")
+    return os.path.join(dest, *parts)
+
+def glob_to_regex(pattern):
+    """glob 패턴을 정규식으로 변환
+
+    '*'와 '?'는 '/'를 넘지 않고, '**'는 여러 디렉토리에 걸쳐 일치한다.
+    ('textures/**/*.png'는 'textures/a.png'와 'textures/a/b/c.png'에 모두 일치)
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[' and ']' in pattern[i + 2:]:
+            end = pattern.index(']', i + 2)
+            body = pattern[i + 1:end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            out.append('[' + body.replace('\\', '\\\\') + ']')
+            i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return '(?s:' + ''.join(out) + r')\Z'
+
+def match_entries(reader, patterns, regex=False):
+    """이름이 패턴 중 하나와 일치하는 디스크립터 인덱스 목록
+
+    glob 패턴은 전체 경로와 일치해야 하고, regex=True면 정규식을 경로 어디에서나 검색한다.
+    정규식은 '(?i)' 같은 인라인 플래그를 쓸 수 있도록 패턴마다 따로 컴파일한다.
+    잘못된 패턴은 ValueError.
+    """
+    compiled = []
+    for p in patterns:
+        try:
+            compiled.append(re.compile(p if regex else glob_to_regex(p.replace('\\', '/'))))
+        except re.error as e:
+            raise ValueError(f"Invalid pattern {p!r}: {e}") from None
+    methods = [c.search if regex else c.match for c in compiled]
+    table = reader.table
+    found = []
+    for i in range(len(table)):
+        name = table.name(i).replace('\\', '/')
+        if any(matches(name) for matches in methods):
+            found.append(i)
+    return found
+
+def _copy_file_range(src, dst, offset, count):
+    return os.copy_file_range(src, dst, count, offset)
+
+def _sendfile(src, dst, offset, count):
+    return os.sendfile(dst, src, offset, count)
+
+# 커널 안에서 파일 -> 파일로 복사할 때 시도할 함수들 (앞에서부터)
+_ZERO_COPY_FUNCS = [func for func, attr in ((_copy_file_range, 'copy_file_range'), (_sendfile, 'sendfile'))
+                    if hasattr(os, attr)]
+
+def _copy_range(src, dst, offset, length):
+    """src의 offset부터 length 바이트를 dst의 현재 위치로 커널 안에서 복사
+
+    copy_file_range, sendfile 순으로 시도하고 둘 다 쓸 수 없으면 False를 반환한다.
+    (다른 파일 시스템 간 복사, 소켓에만 sendfile을 허용하는 플랫폼 등)
+    """
+    for copy in _ZERO_COPY_FUNCS:
+        done = 0
+        try:
+            while done < length:
+                n = copy(src, dst, offset + done, length - done)
+                if n == 0:
+                    raise ValueError(f"Truncated contents: unexpected end of archive at {offset + done}")
+                done += n
+            return True
+        except OSError:
+            # 일부라도 복사했다면 실제 I/O 오류
+            if done:
+                raise
+    return False
+
+def _preallocate(fd, length):
+    """출력 파일 공간을 미리 확보 (지원하지 않는 플랫폼/파일 시스템이면 무시)"""
+    if length and hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(fd, 0, length)
+        except OSError:
+            pass
+
+def _extract_entry(reader, span):
+    """스레드 풀 작업: 엔트리 하나를 미리 할당한 파일로 복사"""
+    offset, length, path = span
+    base = reader.contents_start + offset
+    src = reader.fileno()
+    with open(path, 'wb') as f:
+        _preallocate(f.fileno(), length)
+        if length and not (src is not None and _copy_range(src, f.fileno(), base, length)):
+            # 복사 대상이 커널 복사를 지원하지 않거나 버퍼로 연 경우: mmap 슬라이스 기록
+            f.write(reader._view[base:base + length])
+    return length
+
+def extract(archive, dest, names=None, patterns=None, regex=False, workers=None):
+    """아카이브 엔트리를 dest 디렉토리에 파일로 추출
+
+    names를 주면 해당 엔트리만, patterns(glob 또는 regex=True면 정규식)를 주면
+    일치하는 엔트리만 추출한다. 디렉토리 트리는 먼저 한 번에 만들고, 각 파일은
+    posix_fallocate로 미리 할당한 뒤 copy_file_range/sendfile로 복사한다
+    (불가능하면 mmap 슬라이스를 기록). 엔트리는 콘텐츠 오프셋순으로 workers개
+    스레드(기본: CPU 수)에 배정해 원본을 앞에서부터 읽는다.
+    (파일 수, 바이트 수)를 반환한다.
+    """
+    workers = workers or os.cpu_count() or 1
+    reader = _open_archive(archive)
+    try:
+        if names is not None:
+            indices = [reader._find(name) for name in names]
+        elif patterns:
+            indices = match_entries(reader, patterns, regex)
+        else:
+            indices = range(reader.entries_count)
+
+        table = reader.table
+        spans = sorted((int(table.offsets[i]), int(table.lengths[i]), safe_entry_path(dest, table.name(i)))
+                       for i in indices)
+
+        end = max((offset + length for offset, length, _ in spans), default=0)
+        if reader.contents_start + end > reader.archive_size:
+            raise ValueError(f"Truncated contents: entries end beyond {reader.archive_size} bytes")
+
+        for directory in sorted({os.path.dirname(path) for _, _, path in spans}):
+            os.makedirs(directory, exist_ok=True)
+
+        if workers == 1 or len(spans) < 2:
+            total = sum(_extract_entry(reader, span) for span in spans)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                total = sum(pool.map(lambda span: _extract_entry(reader, span), spans))
+        return len(spans), total
+    finally:
+        if reader is not archive:
+            reader.close()
+
+def _source_length(source):
+    """인코딩 소스(bytes류, 경로, 파일 객체)의 길이"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.stat(source).st_size
+    if hasattr(source, 'read'):
+        pos = source.tell()
+        end = source.seek(0, os.SEEK_END)
+        source.seek(pos)
+        return end - pos
+    return memoryview(source).nbytes
+
+def _copy_source(stream, source, length, chunk_size):
+    """소스 내용을 chunk_size 단위로 stream에 기록"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return _copy_source(stream, f, length, chunk_size)
+
+    if not hasattr(source, 'read'):
+        stream.write(source)
+        return
+
+    remaining = length
+    while remaining > 0:
+        chunk = source.read(min(chunk_size, remaining))
+        if not chunk:
+            break
+        stream.write(chunk)
+        remaining -= len(chunk)
+
+    if remaining:
+        raise ValueError(f"Source shrank while encoding: {remaining} bytes missing")
+
+def _hash_source(source, length, chunk_size=COPY_CHUNK_SIZE):
+    """스레드 풀 작업: 소스 내용의 BLAKE2b 다이제스트 (파일 객체는 원래 위치로 되돌림)"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return _hash_source(f, length, chunk_size)
+
+    if not hasattr(source, 'read'):
+        return hashlib.blake2b(source).digest()
+
+    h = hashlib.blake2b()
+    pos = source.tell()
+    remaining = length
+    while remaining > 0:
+        chunk = source.read(min(chunk_size, remaining))
+        if not chunk:
+            break
+        h.update(chunk)
+        remaining -= len(chunk)
+    source.seek(pos)
+    return h.digest()
+
+def pack_descriptor(name_bytes, contents_offset, contents_len):
+    """디스크립터 1개(256 bytes) 패킹 (이름은 247 bytes까지 0으로 패딩)"""
+    if len(name_bytes) > ENTRY_NAME_LEN_MAX:
+        raise ValueError(f"Entry name too long: {len(name_bytes)}")
+    return DESCRIPTOR_STRUCT.pack(len(name_bytes), name_bytes, contents_offset, contents_len)
+
+def encode_brarchive_to(stream, entries, chunk_size=COPY_CHUNK_SIZE, dedup=False, workers=None):
+    """엔트리들을 brarchive 형식으로 stream에 직접 기록
+
+    entries는 {이름: 소스} 딕셔너리 또는 (이름, 소스) 쌍의 iterable이며,
+    소스는 bytes류, 파일 경로, 또는 현재 위치부터 읽을 파일 객체이다.
+    헤더와 디스크립터 테이블을 먼저 쓰고 콘텐츠는 chunk_size 단위로
+    복사하므로 전체 아카이브를 메모리에 올리지 않는다.
+    dedup=True면 내용을 workers개 스레드에서 BLAKE2b로 해시해 같은 내용은
+    한 번만 기록하고, 중복 엔트리의 디스크립터는 같은 구간을 가리키게 한다.
+    기록한 총 바이트 수를 반환한다.
+    """
+    if hasattr(entries, 'items'):
+        entries = entries.items()
+    entries = sorted(entries, key=lambda item: item[0])  # 정렬하여 일관성 유지
+    lengths = [_source_length(source) for name, source in entries]
+
+    digests = [None] * len(entries)
+    if dedup and len(entries) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            digests = list(pool.map(lambda item, length: _hash_source(item[1], length, chunk_size),
+                                    entries, lengths))
+
+    # 디스크립터 테이블 계산 (같은 (길이, 다이제스트)는 처음 기록한 구간을 공유)
+    table = bytearray()
+    blobs = {}
+    unique = []
+    current_offset = 0
+    for (name, source), content_len, digest in zip(entries, lengths, digests):
+        key = (content_len, digest)
+        offset = blobs.get(key) if digest is not None else None
+        if offset is None:
+            if current_offset > U32_MAX or content_len > U32_MAX:
+                raise ValueError(f"Archive contents exceed 4 GiB at entry: {name}")
+            offset = current_offset
+            blobs[key] = offset
+            unique.append((source, content_len))
+            current_offset += content_len
+        table += pack_descriptor(name.encode('utf-8'), offset, content_len)
+
+    stream.write(HEADER_STRUCT.pack(MAGIC, len(entries), VERSIONS[-1]))
+    stream.write(table)
+
+    # 콘텐츠 영역 쓰기
+    for source, content_len in unique:
+        _copy_source(stream, source, content_len, chunk_size)
+
+    return HEADER_SIZE + len(table) + current_offset
+
+def encode_brarchive(files_dict, dedup=False):
+    """파일 딕셔너리를 brarchive 형식으로 인코딩 (dedup은 encode_brarchive_to() 참고)"""
+    buf = io.BytesIO()
+    encode_brarchive_to(buf, files_dict, dedup=dedup)
+    return buf.getvalue()
+
+
+def _copy_within(fd, src, dst, length, chunk_size=COPY_CHUNK_SIZE):
+    """같은 파일 안에서 겹치지 않는 구간 복사 (copy_file_range, 안 되면 pread/pwrite)"""
+    done = 0
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while done < length:
+                n = os.copy_file_range(fd, fd, length - done, src + done, dst + done)
+                if n == 0:
+                    break
+                done += n
+        except OSError:
+            if done:
+                raise
+    while done < length:
+        chunk = pread(fd, min(chunk_size, length - done), src + done)
+        if not chunk:
+            raise ValueError(f"Truncated contents: unexpected end of archive at {src + done}")
+        os.pwrite(fd, chunk, dst + done)
+        done += len(chunk)
+
+
+class ArchiveUpdater:
+    """기존 아카이브를 제자리에서 수정 (엔트리 추가/교체/삭제)
+
+    새 내용은 파일 끝에 덧붙이고, 엔트리 구성이 그대로면 바뀐 디스크립터(256 bytes)만
+    다시 쓴다. 엔트리를 추가/삭제하면 디스크립터 테이블 크기가 바뀌므로 테이블을
+    이름순으로 다시 쓰는데, 테이블이 커질 때는 늘어난 테이블이 덮게 될 콘텐츠 영역
+    앞부분에 걸친 엔트리만 파일 끝으로 옮긴다. 바뀐 내용과 버려진 구간은 틈으로
+    남으므로 필요하면 compact로 정리한다.
+
+    내용을 덧붙이고 fsync한 뒤에 디스크립터를 쓰므로 commit() 전에 중단되면 원래
+    아카이브가 그대로 남는다. (디스크립터를 쓰는 도중의 중단까지 막지는 않음)
+
+        with ArchiveUpdater('pack.brarchive') as updater:
+            updater.put('textures/stone.png', 'stone.png')
+            updater.remove('textures/old.png')
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'r+b')
+        try:
+            fd = self._file.fileno()
+            size = os.fstat(fd).st_size
+            count, self.version, start = read_header(pread(fd, HEADER_SIZE, 0))
+            self._contents_start = start + count * DESCRIPTOR_SIZE
+            if self._contents_start > size:
+                raise ValueError(f"Truncated descriptor table: need {self._contents_start} bytes, got {size}")
+            # 헤더+디스크립터 테이블만 담은 리더 (테이블 전체가 필요할 때 읽음, 내용 없음)
+            self._reader = None
+            self._disk_count = count
+            self._count = count
+            # 테이블을 다시 쓴 뒤의 변경: 이름 -> (오프셋, 길이), 삭제는 None
+            self._changes = {}
+            # 디스크립터를 아직 기록하지 않은 이름
+            self._pending = set()
+            self._restructured = False
+            # 덧붙일 위치 (콘텐츠 영역 기준)
+            self._end = size - self._contents_start
+            self.appended = 0
+        except Exception:
+            self._file.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        try:
+            if exc_type is None:
+                self.commit()
+        finally:
+            self.close()
+
+    def close(self):
+        self._file.close()
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, name):
+        if name in self._changes:
+            return self._changes[name] is not None
+        return self._lookup(name) >= 0
+
+    def _table_reader(self):
+        """파일의 헤더+디스크립터 테이블을 읽어 만든 리더"""
+        if self._reader is None:
+            fd = self._file.fileno()
+            size = HEADER_SIZE + self._disk_count * DESCRIPTOR_SIZE
+            self._reader = BRArchiveReader(pread(fd, size, 0))
+        return self._reader
+
+    def _lookup(self, name):
+        """파일 테이블에서 디스크립터 위치 찾기 (없으면 -1)
+
+        정렬된 테이블이면 디스크립터 몇 개만 pread로 읽는 이진 탐색으로 찾고,
+        못 찾았을 때만 테이블 전체를 읽는다.
+        """
+        found = _pread_bisect(self._file.fileno(), HEADER_SIZE, self._disk_count, name)
+        if found is not None:
+            return found[0]
+        return self._table_reader().lookup(name)
+
+    def put(self, name, source):
+        """엔트리 추가 또는 교체 (소스는 encode_brarchive_to()와 같음, 내용은 바로 파일 끝에 기록)"""
+        if len(name.encode('utf-8')) > ENTRY_NAME_LEN_MAX:
+            raise ValueError(f"Entry name too long: {name!r}")
+        length = _source_length(source)
+        if self._end > U32_MAX or length > U32_MAX:
+            raise ValueError(f"Archive contents exceed 4 GiB at entry: {name}")
+
+        self._file.seek(self._contents_start + self._end)
+        _copy_source(self._file, source, length, COPY_CHUNK_SIZE)
+        if name not in self:
+            self._restructured = True
+            self._count += 1
+        self._changes[name] = (self._end, length)
+        self._pending.add(name)
+        self._end += length
+        self.appended += length
+
+    def remove(self, name):
+        """엔트리 삭제 (없으면 KeyError, 내용은 틈으로 남음)"""
+        if name not in self:
+            raise KeyError(name)
+        self._changes[name] = None
+        self._restructured = True
+        self._count -= 1
+
+    def commit(self):
+        """덧붙인 내용을 디스크에 반영한 뒤 디스크립터(와 헤더) 기록"""
+        fd = self._file.fileno()
+        self._file.flush()
+        if not self._restructured:
+            if self._pending:
+                self._sync()
+                for name in self._pending:
+                    offset, length = self._changes[name]
+                    os.pwrite(fd, pack_descriptor(name.encode('utf-8'), offset, length),
+                              HEADER_SIZE + self._lookup(name) * DESCRIPTOR_SIZE)
+                self._pending.clear()
+            return
+
+        table = self._table_reader().table
+        entries = {name: (int(offset), int(length))
+                   for name, offset, length in zip(table.names(), table.offsets, table.lengths)}
+        for name, span in self._changes.items():
+            if span is None:
+                entries.pop(name, None)
+            else:
+                entries[name] = span
+
+        names = sorted(entries)
+        new_start = HEADER_SIZE + len(names) * DESCRIPTOR_SIZE
+        shift = new_start - self._contents_start
+
+        # 커진 테이블이 덮을 콘텐츠 앞부분 [0, shift)에 걸친 엔트리는 파일 끝으로 옮김
+        # (같은 구간을 공유하는 엔트리는 한 번만 옮김)
+        moved = {}
+        if shift > 0:
+            self._end = max(self._end, shift)
+        for name in names:
+            offset, length = entries[name]
+            if offset >= shift:
+                continue
+            if (offset, length) not in moved:
+                moved[offset, length] = self._end
+                _copy_within(fd, self._contents_start + offset, self._contents_start + self._end, length)
+                self._end += length
+            entries[name] = (moved[offset, length], length)
+
+        header = HEADER_STRUCT.pack(MAGIC, len(names), self.version)
+        descriptors = bytearray()
+        for name in names:
+            offset, length = entries[name]
+            if offset - shift > U32_MAX:
+                raise ValueError(f"Archive contents exceed 4 GiB at entry: {name}")
+            descriptors += pack_descriptor(name.encode('utf-8'), offset - shift, length)
+
+        self._sync()
+        os.pwrite(fd, descriptors, HEADER_SIZE)
+        os.pwrite(fd, header, 0)
+
+        self._reader = BRArchiveReader(header + descriptors)
+        self._disk_count = len(names)
+        self._contents_start = new_start
+        self._end -= shift
+        self._changes.clear()
+        self._pending.clear()
+        self._restructured = False
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+def compact(path, output=None):
+    """아카이브에서 틈과 버려진 내용을 없애고 다시 쓰기
+
+    디스크립터 테이블에서 살아 있는 구간을 구해 디스크립터 순서대로 콘텐츠를
+    빈틈없이 다시 배치한다. 같은 구간을 공유하던 엔트리(중복 제거)는 계속 공유한다.
+    원본에서 이어져 있는 구간은 한 번의 copy_file_range로 복사한다.
+    같은 디렉토리의 임시 파일에 쓰고 fsync한 뒤 os.replace로 output(기본: path)을
+    바꾸므로 중간에 중단되어도 원본은 그대로 남는다. (원래 크기, 새 크기)를 반환한다.
+    """
+    output = output or path
+    with BRArchiveReader(path) as reader:
+        reader.check_bounds()
+        table = reader.table
+        count = reader.entries_count
+
+        # 원본 구간 -> 새 오프셋 (디스크립터 순서대로 처음 나온 구간에 배정)
+        placed = {}
+        copies = []
+        new_offsets = []
+        end = 0
+        for i in range(count):
+            span = (int(table.offsets[i]), int(table.lengths[i]))
+            if span not in placed:
+                placed[span] = end
+                src = reader.contents_start + span[0]
+                if copies and copies[-1][0] + copies[-1][1] == src:
+                    copies[-1][1] += span[1]
+                else:
+                    copies.append([src, span[1]])
+                end += span[1]
+            new_offsets.append(placed[span])
+
+        descriptors = bytearray(reader._view[HEADER_SIZE:reader.contents_start])
+        for i, offset in enumerate(new_offsets):
+            struct.pack_into('<I', descriptors, i * DESCRIPTOR_SIZE + 1 + ENTRY_NAME_LEN_MAX, offset)
+
+        fd, tmp_path = tempfile.mkstemp(prefix='.compact-', suffix='.brarchive',
+                                        dir=os.path.dirname(os.path.abspath(output)))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(HEADER_STRUCT.pack(MAGIC, count, reader.version))
+                f.write(descriptors)
+                f.flush()
+                src = reader.fileno()
+                for offset, length in copies:
+                    if not _copy_range(src, f.fileno(), offset, length):
+                        f.write(reader._view[offset:offset + length])
+                        f.flush()
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        old_size, new_size = reader.archive_size, reader.contents_start + end
+
+    # 원본 mmap을 닫은 뒤 교체 (Windows에서는 열려 있는 파일을 바꿀 수 없음)
+    try:
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp_path, output)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return old_size, new_size
+
+
+def collect_sources(paths):
+    """파일/디렉토리 경로들을 {엔트리 이름: 파일 경로}로 수집
+
+    디렉토리는 하위 파일 전체를 디렉토리 기준 상대 경로('/' 구분)로 추가한다.
+    """
+    sources = {}
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for file_name in sorted(files):
+                    full_path = os.path.join(root, file_name)
+                    name = os.path.relpath(full_path, path).replace(os.sep, '/')
+                    sources[name] = full_path
+        else:
+            sources[os.path.basename(path)] = path
+    return sources
+
+
+def find_archives(patterns):
+    """디렉토리(재귀) 또는 glob 패턴들에서 .brarchive 파일 목록 수집"""
+    found = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, dirs, files in os.walk(pattern):
+                dirs.sort()
+                found.extend(os.path.join(root, f) for f in sorted(files)
+                             if f.lower().endswith('.brarchive'))
+        else:
+            found.extend(sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p)))
+    return list(dict.fromkeys(found))
+
+def _extract_one(path, dest):
+    """프로세스 풀 작업: 아카이브 하나를 추출하고 결과 요약 반환"""
+    t0 = time.perf_counter()
+    try:
+        # 아카이브 단위로 이미 프로세스 병렬이므로 엔트리는 한 스레드에서 추출
+        count, total = extract(path, dest, workers=1)
+        error = None
+    except (OSError, ValueError, KeyError) as e:
+        count, total, error = 0, 0, str(e)
+    return path, count, total, time.perf_counter() - t0, error
+
+def extract_batch(archives, dest, workers=None):
+    """여러 아카이브를 프로세스 풀에서 동시에 추출
+
+    각 아카이브는 dest 아래에 공통 상위 디렉토리 기준 상대 경로(확장자 제외)로
+    추출된다. 완료되는 순서대로 (경로, 파일 수, 바이트 수, 소요 시간, 오류)를 생성한다.
+    """
+    # multiprocessing 임포트 비용을 CLI 시작 시간에서 빼기 위해 지연 임포트
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    if not archives:
+        return
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in archives])
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for path in archives:
+            rel = os.path.relpath(os.path.abspath(path), root)
+            out_dir = os.path.join(dest, os.path.splitext(rel)[0])
+            futures.append(pool.submit(_extract_one, path, out_dir))
+        for future in as_completed(futures):
+            yield future.result()
+
+
+# scan 결과 레코드의 필드 (tables=True면 SCAN_TABLE_FIELDS가 추가됨)
+SCAN_FIELDS = ['path', 'size', 'entries', 'version', 'error']
+SCAN_TABLE_FIELDS = ['contents', 'contents_end']
+
+def iter_archive_paths(paths):
+    """파일 경로는 그대로, 디렉토리는 os.scandir로 재귀 탐색해 .brarchive 경로 생성"""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        stack = [path]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith('.brarchive'):
+                        yield entry.path
+
+def table_extent(table):
+    """(내용 길이 합계, 콘텐츠 영역 기준 가장 먼 엔트리 끝)"""
+    if not len(table):
+        return 0, 0
+    if hasattr(table.lengths, 'sum'):
+        ends = table.offsets.astype('u8') + table.lengths
+        return int(table.lengths.sum(dtype='u8')), int(ends.max())
+    return sum(table.lengths), max(map(operator.add, table.offsets, table.lengths))
+
+def scan_archive(path, tables=False):
+    """헤더 16바이트만 읽어 아카이브 요약 레코드 생성
+
+    tables=True면 디스크립터 테이블도 읽어 내용 길이 합계와 콘텐츠 끝 위치를
+    추가한다. 읽기/파싱 오류는 예외 대신 레코드의 'error'에 담는다.
+    """
+    record = {'path': path, 'size': None, 'entries': None, 'version': None, 'error': None}
+    if tables:
+        record.update(contents=None, contents_end=None)
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            record['size'] = os.fstat(fd).st_size
+            count, version, start = read_header(pread(fd, HEADER_SIZE, 0))
+            record.update(entries=count, version=version)
+            if tables:
+                table_size = count * DESCRIPTOR_SIZE
+                if HEADER_SIZE + table_size > record['size']:
+                    raise ValueError(f"Truncated descriptor table: need {HEADER_SIZE + table_size} bytes, "
+                                     f"got {record['size']}")
+                table = parse_descriptors(memoryview(pread(fd, table_size, start)), 0, count)
+                contents, end = table_extent(table)
+                record.update(contents=contents, contents_end=HEADER_SIZE + table_size + end)
+        finally:
+            os.close(fd)
+    except (OSError, ValueError) as e:
+        record['error'] = str(e)
+    return record
+
+def scan(paths, tables=False, workers=None):
+    """여러 아카이브(디렉토리는 재귀)를 스레드 풀에서 scan_archive하고 입력 순서대로 레코드 생성"""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(lambda path: scan_archive(path, tables), iter_archive_paths(paths))
+
+
+def _entry_digest(reader, i):
+    """스레드 풀 작업: i번째 엔트리 내용(mmap 슬라이스)의 BLAKE2b 다이제스트"""
+    return hashlib.blake2b(reader.get_at(i)).digest()
+
+def diff(a, b, workers=None):
+    """두 아카이브(경로 또는 리더)의 엔트리 비교
+
+    디스크립터 테이블의 이름과 크기를 먼저 비교하고, 내용을 확인해야 하는 엔트리만
+    (이름과 크기가 같은 엔트리, 크기가 같은 삭제/추가 엔트리) workers개 스레드에서
+    mmap 슬라이스를 BLAKE2b로 해시한다. 내용이 같은 삭제/추가 엔트리 쌍은 이동으로 본다.
+
+    {'added': [(이름, 크기)], 'removed': [(이름, 크기)],
+     'changed': [(이름, 이전 크기, 새 크기)], 'moved': [(이전 이름, 새 이름, 크기)],
+     'unchanged': 개수}를 반환한다. 목록은 이름순이다.
+    """
+    old, new = _open_archive(a), _open_archive(b)
+    try:
+        old_sizes = {name: (i, int(size)) for i, (name, size)
+                     in enumerate(zip(old.table.names(), old.table.lengths))}
+        new_sizes = {name: (i, int(size)) for i, (name, size)
+                     in enumerate(zip(new.table.names(), new.table.lengths))}
+
+        changed, same_size = [], []
+        for name, (j, size) in new_sizes.items():
+            if name in old_sizes:
+                i, old_size = old_sizes[name]
+                if old_size != size:
+                    changed.append((name, old_size, size))
+                else:
+                    same_size.append((name, i, j))
+        removed = {name: entry for name, entry in old_sizes.items() if name not in new_sizes}
+        added = {name: entry for name, entry in new_sizes.items() if name not in old_sizes}
+
+        # 이동 후보: 크기가 같은 삭제/추가 엔트리
+        removed_by_size = collections.defaultdict(list)
+        for name, (i, size) in removed.items():
+            removed_by_size[size].append(name)
+        moved_candidates = [name for name, (j, size) in added.items() if size in removed_by_size]
+        moved_sources = sorted({source for name in moved_candidates for source in removed_by_size[added[name][1]]})
+
+        # 해시할 엔트리: (리더, 인덱스)
+        tasks = [(old, i) for _, i, _ in same_size] + [(new, j) for _, _, j in same_size]
+        tasks += [(new, added[name][0]) for name in moved_candidates]
+        tasks += [(old, removed[name][0]) for name in moved_sources]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            digests = dict(zip(tasks, pool.map(lambda task: _entry_digest(*task), tasks)))
+
+        unchanged = 0
+        for name, i, j in same_size:
+            if digests[old, i] == digests[new, j]:
+                unchanged += 1
+            else:
+                changed.append((name, old_sizes[name][1], new_sizes[name][1]))
+
+        moved = []
+        by_digest = collections.defaultdict(list)
+        for name in moved_sources:
+            by_digest[removed[name][1], digests[old, removed[name][0]]].append(name)
+        for name in sorted(moved_candidates):
+            j, size = added[name]
+            sources = by_digest.get((size, digests[new, j]))
+            if sources:
+                source = sources.pop(0)
+                moved.append((source, name, size))
+                del removed[source]
+                del added[name]
+
+        return {
+            'added': sorted((name, size) for name, (j, size) in added.items()),
+            'removed': sorted((name, size) for name, (i, size) in removed.items()),
+            'changed': sorted(changed),
+            'moved': moved,
+            'unchanged': unchanged,
+        }
+    finally:
+        if old is not a:
+            old.close()
+        if new is not b:
+            new.close()
+
+
+class _PatchOps:
+    """패치 연산 기록기 (이어지는 COPY는 하나로 합침)"""
+
+    def __init__(self, fileobj):
+        self._f = fileobj
+        self._copy = None
+        self.copied_bytes = 0
+        self.literal_bytes = 0
+
+    def copy(self, offset, length):
+        if not length:
+            return
+        if self._copy is not None and self._copy[0] + self._copy[1] == offset:
+            self._copy[1] += length
+        else:
+            self.flush()
+            self._copy = [offset, length]
+        self.copied_bytes += length
+
+    def literal(self, data):
+        if not len(data):
+            return
+        self.flush()
+        self._f.write(PATCH_OP_STRUCT.pack(PATCH_OP_LITERAL, len(data), 0))
+        self._f.write(data)
+        self.literal_bytes += len(data)
+
+    def flush(self):
+        if self._copy is not None:
+            self._f.write(PATCH_OP_STRUCT.pack(PATCH_OP_COPY, *self._copy))
+            self._copy = None
+
+
+def _block_digest(block):
+    return hashlib.blake2b(block, digest_size=16).digest()
+
+def _block_weak(np, blocks, block_size):
+    """(블록 수, 블록 크기) uint64 배열의 rsync식 약한 체크섬 (a + b << 16)"""
+    a = blocks.sum(axis=1)
+    b = (blocks * np.arange(block_size, 0, -1, dtype=np.uint64)).sum(axis=1)
+    return (a & 0xFFFF) | ((b & 0xFFFF) << 16)
+
+def _rolling_weak(np, data, block_size):
+    """data의 모든 위치 k에서 data[k:k + block_size]의 약한 체크섬 (누적합으로 한 번에 계산)"""
+    x = np.frombuffer(data, np.uint8).astype(np.uint64)
+    s = np.concatenate((np.zeros(1, np.uint64), np.cumsum(x)))
+    t = np.concatenate((np.zeros(1, np.uint64), np.cumsum(x * np.arange(len(x), dtype=np.uint64))))
+    k = np.arange(len(x) - block_size + 1, dtype=np.uint64)
+    a = s[block_size:] - s[:-block_size]
+    # b = sum((k + B - j) * x[j]) = (k + B) * a - (t[k + B] - t[k]), uint64 오버플로는 하위 16비트에 영향 없음
+    b = (k + np.uint64(block_size)) * a - (t[block_size:] - t[:-block_size])
+    return (a & 0xFFFF) | ((b & 0xFFFF) << 16)
+
+def _block_delta(ops, old, old_base, new, block_size):
+    """rsync식 블록 델타: new를 old의 블록 복사(COPY)와 리터럴로 표현
+
+    old는 블록 크기로 나눠 강한 해시(BLAKE2b) 사전을 만든다. NumPy가 있으면 new의 모든
+    위치에서 약한 체크섬을 누적합으로 계산해 일치 후보 위치만 강한 해시로 확인하므로
+    삽입/삭제로 밀린 블록도 찾는다. 없으면 마지막 일치 위치부터 블록 단위로만 비교한다.
+    old_base는 old 시작의 이전 아카이브 기준 절대 오프셋이다.
+    """
+    np = _numpy()
+    count = len(old) // block_size
+    blocks = {}
+    for i in range(count):
+        blocks.setdefault(_block_digest(old[i * block_size:(i + 1) * block_size]), i * block_size)
+
+    pos = 0
+    if np is not None and count and len(new) >= block_size:
+        raw = np.frombuffer(old, np.uint8, count * block_size).astype(np.uint64)
+        weak_set = np.unique(_block_weak(np, raw.reshape(count, block_size), block_size))
+        for start in range(0, len(new) - block_size + 1, PATCH_DELTA_WINDOW):
+            window = new[start:min(len(new), start + PATCH_DELTA_WINDOW + block_size - 1)]
+            for k in (np.flatnonzero(np.isin(_rolling_weak(np, window, block_size), weak_set)) + start).tolist():
+                if k < pos:
+                    continue
+                offset = blocks.get(_block_digest(new[k:k + block_size]))
+                if offset is not None:
+                    ops.literal(new[pos:k])
+                    ops.copy(old_base + offset, block_size)
+                    pos = k + block_size
+    else:
+        literal_start = 0
+        while pos + block_size <= len(new):
+            offset = blocks.get(_block_digest(new[pos:pos + block_size]))
+            if offset is not None:
+                ops.literal(new[literal_start:pos])
+                ops.copy(old_base + offset, block_size)
+                literal_start = pos + block_size
+            pos += block_size
+        pos = literal_start
+    ops.literal(new[pos:])
+
+def _span_digest(reader, span):
+    """스레드 풀 작업: 콘텐츠 영역 기준 구간 (오프셋, 길이)의 BLAKE2b 다이제스트"""
+    start = reader.contents_start + span[0]
+    return hashlib.blake2b(reader._view[start:start + span[1]]).digest()
+
+def make_patch(old, new, fileobj, delta=False, block_size=PATCH_BLOCK_SIZE, workers=None):
+    """이전 아카이브에서 새 아카이브를 만드는 패치를 fileobj에 기록
+
+    새 아카이브를 바이트 단위로 똑같이 재현한다. 새 콘텐츠 영역을 오프셋순으로 훑으며
+    이전 아카이브에 같은 내용(길이+BLAKE2b, 이름이 달라도 됨)이 있으면 참조(COPY)만
+    기록하고, 없으면 내용(LITERAL)을 넣는다. delta=True면 PATCH_DELTA_MIN 이상인
+    바뀐 엔트리는 같은 이름의 이전 엔트리와 블록 델타를 만든다. 해시는 mmap 위에서
+    workers개 스레드로 계산한다. (참조한 바이트 수, 포함한 바이트 수)를 반환한다.
+    """
+    if block_size <= 0:
+        raise ValueError(f"Block size must be positive: {block_size}")
+    old_reader, new_reader = _open_archive(old), _open_archive(new)
+    try:
+        old_reader.check_bounds()
+        new_reader.check_bounds()
+        old_table, new_table = old_reader.table, new_reader.table
+
+        # 새 콘텐츠 영역의 고유 구간과 (델타 기준으로 쓸) 첫 번째 이름
+        new_spans = {}
+        for i in range(len(new_table)):
+            new_spans.setdefault((int(new_table.offsets[i]), int(new_table.lengths[i])), new_table.name(i))
+        lengths = {length for _, length in new_spans}
+        old_spans = {(int(offset), int(length)) for offset, length in zip(old_table.offsets, old_table.lengths)
+                     if int(length) in lengths}
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            full_digest = pool.submit(lambda: hashlib.blake2b(new_reader._view, digest_size=32).digest())
+            new_digests = dict(zip(new_spans, pool.map(lambda span: _span_digest(new_reader, span), new_spans)))
+            old_digests = dict(zip(old_spans, pool.map(lambda span: _span_digest(old_reader, span), old_spans)))
+            full_digest = full_digest.result()
+        old_by_digest = {(span[1], digest): span[0] for span, digest in old_digests.items()}
+
+        head = zlib.compress(new_reader._view[:new_reader.contents_start], 6)
+        table_digest = hashlib.blake2b(old_reader._view[:old_reader.contents_start], digest_size=32).digest()
+        fileobj.write(PATCH_MAGIC)
+        fileobj.write(PATCH_HEADER_STRUCT.pack(old_reader.archive_size, table_digest,
+                                               new_reader.archive_size, len(head)))
+        fileobj.write(head)
+
+        ops = _PatchOps(fileobj)
+        view, base = new_reader._view, new_reader.contents_start
+        cursor = 0
+        for offset, length in sorted(new_spans):
+            if offset > cursor:
+                # 어느 엔트리도 가리키지 않는 틈
+                ops.literal(view[base + cursor:base + offset])
+                cursor = offset
+            if offset + length <= cursor:
+                continue  # 이미 기록한 구간 안에 포함됨
+            if offset < cursor:
+                # 앞 구간과 일부만 겹치는 구간: 남은 부분만 그대로 넣음
+                ops.literal(view[base + cursor:base + offset + length])
+                cursor = offset + length
+                continue
+
+            source = old_by_digest.get((length, new_digests[offset, length]))
+            contents = view[base + offset:base + offset + length]
+            if source is not None:
+                ops.copy(old_reader.contents_start + source, length)
+            elif delta and length >= PATCH_DELTA_MIN and old_reader.lookup(new_spans[offset, length]) >= 0:
+                j = old_reader.lookup(new_spans[offset, length])
+                old_base = old_reader.contents_start + old_reader._descriptor_at(j)[1]
+                _block_delta(ops, old_reader.get_at(j), old_base, contents, block_size)
+            else:
+                ops.literal(contents)
+            cursor = offset + length
+
+        ops.literal(view[base + cursor:])
+        ops.flush()
+        fileobj.write(PATCH_OP_STRUCT.pack(PATCH_OP_END, 0, 0))
+        fileobj.write(full_digest)
+        return ops.copied_bytes, ops.literal_bytes
+    finally:
+        if old_reader is not old:
+            old_reader.close()
+        if new_reader is not new:
+            new_reader.close()
+
+def _read_exact(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError(f"Truncated patch: expected {size} bytes, got {len(data)}")
+    return data
+
+def apply_patch(old_path, patch_path, output, chunk_size=COPY_CHUNK_SIZE):
+    """이전 아카이브에 패치를 적용해 새 아카이브를 output에 기록
+
+    패치와 이전 아카이브를 chunk_size 단위로 읽으며 같은 디렉토리의 임시 파일에 쓰고,
+    새 아카이브 전체 다이제스트를 확인한 뒤 os.replace로 output을 바꾼다. (output이
+    이전 아카이브와 같아도 됨) 다른 아카이브용 패치이거나 손상되었으면 ValueError.
+    새 아카이브 크기를 반환한다.
+    """
+    with open(patch_path, 'rb') as patch, open(old_path, 'rb') as old:
+        if _read_exact(patch, len(PATCH_MAGIC)) != PATCH_MAGIC:
+            raise ValueError("Not a brarchive patch")
+        old_size, table_digest, new_size, head_size = PATCH_HEADER_STRUCT.unpack(
+            _read_exact(patch, PATCH_HEADER_STRUCT.size))
+
+        # 이전 아카이브 확인 (크기 + 헤더/디스크립터 테이블 다이제스트)
+        old_fd = old.fileno()
+        count, version, start = read_header(pread(old_fd, HEADER_SIZE, 0))
+        h = hashlib.blake2b(digest_size=32)
+        table_end = start + count * DESCRIPTOR_SIZE
+        for pos in range(0, table_end, chunk_size):
+            h.update(pread(old_fd, min(chunk_size, table_end - pos), pos))
+        if os.fstat(old_fd).st_size != old_size or h.digest() != table_digest:
+            raise ValueError(f"Patch does not apply to {old_path}: base archive differs")
+
+        fd, tmp_path = tempfile.mkstemp(prefix='.patch-', suffix='.brarchive',
+                                        dir=os.path.dirname(os.path.abspath(output)))
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                digest = hashlib.blake2b(digest_size=32)
+
+                def write(data):
+                    out.write(data)
+                    digest.update(data)
+
+                decompressor = zlib.decompressobj()
+                remaining = head_size
+                try:
+                    while remaining:
+                        chunk = _read_exact(patch, min(chunk_size, remaining))
+                        write(decompressor.decompress(chunk))
+                        remaining -= len(chunk)
+                    write(decompressor.flush())
+                except zlib.error as e:
+                    raise ValueError(f"Corrupt patch: {e}") from None
+                # 압축 스트림이 정확히 head_size 바이트에서 끝나야 함 (잘림, 뒤에 붙은 데이터)
+                if not decompressor.eof or decompressor.unused_data:
+                    raise ValueError("Corrupt patch: compressed header and table do not match their length")
+
+                while True:
+                    op, a, b = PATCH_OP_STRUCT.unpack(_read_exact(patch, PATCH_OP_STRUCT.size))
+                    if op == PATCH_OP_END:
+                        break
+                    if op == PATCH_OP_COPY:
+                        if a + b > old_size:
+                            raise ValueError(f"Corrupt patch: copy {a}+{b} beyond base archive")
+                        for pos in range(a, a + b, chunk_size):
+                            write(pread(old_fd, min(chunk_size, a + b - pos), pos))
+                    elif op == PATCH_OP_LITERAL:
+                        for pos in range(0, a, chunk_size):
+                            write(_read_exact(patch, min(chunk_size, a - pos)))
+                    else:
+                        raise ValueError(f"Corrupt patch: unknown op {op}")
+
+                if out.tell() != new_size or digest.digest() != _read_exact(patch, 32):
+                    raise ValueError("Patched archive does not match the expected digest")
+                if patch.read(1):
+                    raise ValueError("Corrupt patch: trailing data after the final digest")
+                out.flush()
+                os.fsync(out.fileno())
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    # 이전 아카이브를 닫은 뒤 교체 (output이 이전 아카이브와 같을 수 있음)
+    try:
+        os.chmod(tmp_path, os.stat(old_path).st_mode & 0o7777)
+        os.replace(tmp_path, output)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return new_size
+
+
+def zip_compress_type(name):
+    """엔트리 확장자에 따른 ZIP 압축 방식"""
+    if os.path.splitext(name)[1].lower() in ZIP_STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+def _zip_info(name, size, level):
+    """엔트리용 ZipInfo 생성 (압축 방식은 확장자에 따라 결정)"""
+    zinfo = zipfile.ZipInfo(name, time.localtime()[:6])
+    zinfo.compress_type = zip_compress_type(name) if size else zipfile.ZIP_STORED
+    zinfo.external_attr = 0o600 << 16
+    zinfo._compresslevel = level  # ZipInfo를 직접 넘기면 ZipFile의 기본값이 적용되지 않음
+    zinfo.file_size = size
+    return zinfo
+
+def _zip_compress(contents, compress_type, level):
+    """스레드 풀 작업: CRC32와 raw deflate 스트림 계산 (zlib는 GIL을 해제함)"""
+    crc = zlib.crc32(contents)
+    if compress_type == zipfile.ZIP_STORED:
+        return crc, contents
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return crc, compressor.compress(contents) + compressor.flush()
+
+def _zip_write_raw(zf, zinfo, crc, data):
+    """미리 압축한 데이터를 ZIP에 기록 (ZipFile._open_to_write와 같은 순서로 처리)"""
+    zinfo.CRC = crc
+    zinfo.compress_size = len(data)
+    zinfo.flag_bits = 0
+    if zf._seekable:
+        zf.fp.seek(zf.start_dir)
+    zinfo.header_offset = zf.fp.tell()
+
+    zf._writecheck(zinfo)
+    zf._didModify = True
+
+    zf.fp.write(zinfo.FileHeader())
+    zf.fp.write(data)
+    zf.start_dir = zf.fp.tell()
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+
+def write_zip(archive, fileobj, level=ZIP_DEFAULT_LEVEL, progress=None, workers=None,
+              chunk_size=COPY_CHUNK_SIZE, deadline=None):
+    """아카이브 엔트리들을 ZIP으로 fileobj에 기록
+
+    archive는 리더 또는 {이름: 내용} 딕셔너리이다. 이미 압축된 형식은
+    ZIP_STORED로, 나머지는 지정한 level의 ZIP_DEFLATED로 저장한다.
+    엔트리 압축과 CRC 계산은 workers개 스레드에서 병렬로 하고, 결과는 원래
+    순서대로 기록한다. 대기 중인 작업은 workers * 2개, 원본 크기 합
+    ZIP_PARALLEL_MAX_PENDING 이하로 유지한다. ZIP_PARALLEL_MAX_ENTRY보다 큰
+    엔트리는 압축 결과를 메모리에 모으지 않도록 chunk_size 단위로 스트리밍한다.
+    progress(완료 수, 전체 수) 콜백을 주면 엔트리마다 호출한다.
+    deadline(deadline_after() 결과)을 넘기면 엔트리마다 확인해 TimeoutError로 중단한다.
+    """
+    workers = workers or os.cpu_count() or 1
+    total = len(archive)
+    done = 0
+    pending = collections.deque()
+    pending_size = 0
+
+    with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED, compresslevel=level) as zf, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+
+        def flush(limit, size_limit=0):
+            # 앞에서부터 완료된 압축 결과를 순서대로 기록
+            # (대기 중인 작업 수를 limit, 원본 크기 합을 size_limit 이하로 유지)
+            nonlocal done, pending_size
+            while pending and (len(pending) > limit or pending_size > size_limit):
+                zinfo, future = pending.popleft()
+                pending_size -= zinfo.file_size
+                _zip_write_raw(zf, zinfo, *future.result())
+                done += 1
+                if progress is not None:
+                    progress(done, total)
+
+        for name, contents in archive.items():
+            check_deadline(deadline)
+            contents = memoryview(contents).cast('B')
+            zinfo = _zip_info(name, contents.nbytes, level)
+
+            if contents.nbytes <= ZIP_PARALLEL_MAX_ENTRY:
+                pending.append((zinfo, pool.submit(_zip_compress, contents, zinfo.compress_type, level)))
+                pending_size += contents.nbytes
+                flush(workers * 2, ZIP_PARALLEL_MAX_PENDING)
+                continue
+
+            flush(0)
+            with zf.open(zinfo, 'w') as dst:
+                for start in range(0, contents.nbytes, chunk_size):
+                    check_deadline(deadline)
+                    dst.write(contents[start:start + chunk_size])
+            done += 1
+            if progress is not None:
+                progress(done, total)
+
+        flush(0)
+
+
+# 명령줄 도구
+
+def _cmd_info(args):
+    with BRArchiveReader(args.archive) as archive:
+        contents_size = sum(int(length) for length in archive.table.lengths)
+        print(f"file:      {args.archive}")
+        print(f"magic:     {hex(MAGIC)}")
+        print(f"version:   {archive.version}")
+        print(f"entries:   {archive.entries_count}")
+        print(f"size:      {archive.archive_size:,} bytes")
+        print(f"contents:  {contents_size:,} bytes")
+    return 0
+
+def _cmd_list(args):
+    with BRArchiveReader(args.archive) as archive:
+        table = archive.table
+        if args.directory is None:
+            positions = range(len(table))
+        else:
+            # 디렉토리 아래 엔트리만 (정렬 인덱스에서 bisect로 구간 찾기)
+            index = archive.path_index()
+            lo, hi = index.dir_range(args.directory)
+            positions = index.order[lo:hi]
+
+        for i in positions:
+            if args.long:
+                print(f"{int(table.lengths[i]):>12,} {int(table.offsets[i]):>12} {table.name(i)}")
+            else:
+                print(table.name(i))
+    return 0
+
+def _cmd_extract(args):
+    count, total = extract(args.archive, args.output, args.names or None, args.include, args.regex,
+                           args.workers)
+    print(f"{count} files, {total:,} bytes -> {args.output}", file=sys.stderr)
+    return 0
+
+def _cmd_encode(args):
+    sources = collect_sources(args.inputs)
+    with open(args.output, 'wb') as f:
+        size = encode_brarchive_to(f, sources, dedup=args.dedup, workers=args.workers)
+    print(f"{len(sources)} files, {size:,} bytes -> {args.output}", file=sys.stderr)
+    if args.dedup:
+        full = HEADER_SIZE + len(sources) * DESCRIPTOR_SIZE + sum(map(_source_length, sources.values()))
+        print(f"dedup saved {full - size:,} bytes", file=sys.stderr)
+    return 0
+
+def _cmd_cat(args):
+    try:
+        contents = read_entry(args.archive, args.name)
+    except KeyError:
+        print(f"error: no such entry: {args.name}", file=sys.stderr)
+        return 1
+    sys.stdout.buffer.write(contents)
+    sys.stdout.buffer.flush()
+    return 0
+
+def _cmd_batch(args):
+    archives = find_archives(args.inputs)
+    if not archives:
+        print("error: no archives found", file=sys.stderr)
+        return 1
+
+    t0 = time.perf_counter()
+    files = total = failed = 0
+    for path, count, size, seconds, error in extract_batch(archives, args.output, args.workers):
+        if error:
+            failed += 1
+            print(f"FAIL {path}: {error}")
+            continue
+        files += count
+        total += size
+        rate = size / seconds / 1e6 if seconds > 0 else 0.0
+        print(f"ok   {path}: {count} files, {size / 1e6:.1f} MB, {seconds:.2f}s ({rate:.1f} MB/s)")
+
+    elapsed = time.perf_counter() - t0
+    rate = total / elapsed / 1e6 if elapsed > 0 else 0.0
+    print(f"{len(archives) - failed}/{len(archives)} archives, {files} files, "
+          f"{total / 1e6:.1f} MB in {elapsed:.2f}s ({rate:.1f} MB/s)")
+    return 1 if failed else 0
+
+def _cmd_zip(args):
+    with BRArchiveReader(args.archive) as archive, open(args.output, 'wb') as f:
+        write_zip(archive, f, level=args.level, workers=args.workers)
+        size = f.tell()
+    print(f"{len(archive)} files, {size:,} bytes -> {args.output}", file=sys.stderr)
+    return 0
+
+def _cmd_scan(args):
+    fields = SCAN_FIELDS + (SCAN_TABLE_FIELDS if args.tables else [])
+    if args.format == 'csv':
+        writer = csv.DictWriter(sys.stdout, fieldnames=fields, lineterminator='\n')
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        def write(record):
+            sys.stdout.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    t0 = time.perf_counter()
+    count = failed = 0
+    for record in scan(args.inputs, args.tables, args.workers):
+        write(record)
+        count += 1
+        failed += record['error'] is not None
+
+    elapsed = time.perf_counter() - t0
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"{count} archives, {failed} errors in {elapsed:.2f}s ({rate:,.0f} files/s)", file=sys.stderr)
+    return 1 if failed else 0
+
+def _cmd_validate(args):
+    failed = 0
+    for path in args.archives:
+        # 읽을 수 없는 파일도 실패로 기록하고 나머지 아카이브는 계속 검사
+        try:
+            with open(path, 'rb') as f:
+                data = BRArchiveReader._map_file(f)
+                try:
+                    problems = validate(data)
+                finally:
+                    if isinstance(data, mmap.mmap):
+                        data.close()
+        except (OSError, ValueError) as e:
+            failed += 1
+            print(f"FAIL {path}: {e}")
+            continue
+        if not problems:
+            print(f"ok   {path}")
+            continue
+        failed += 1
+        print(f"FAIL {path}: {len(problems)} problems")
+        for kind, index, message in problems[:args.limit]:
+            print(f"  {kind:<12} {message}")
+        if len(problems) > args.limit:
+            print(f"  ... {len(problems) - args.limit} more")
+    return 1 if failed else 0
+
+def _cmd_update(args):
+    sources = list(collect_sources(args.inputs).items()) + [tuple(pair) for pair in args.add]
+    t0 = time.perf_counter()
+    added = replaced = 0
+    with ArchiveUpdater(args.archive) as updater:
+        for name in args.remove:
+            updater.remove(name)
+        for name, path in sources:
+            if name in updater:
+                replaced += 1
+            else:
+                added += 1
+            updater.put(name, path)
+    elapsed = time.perf_counter() - t0
+    print(f"{added} added, {replaced} replaced, {len(args.remove)} removed, "
+          f"{updater.appended:,} bytes appended in {elapsed * 1e3:.1f} ms", file=sys.stderr)
+    return 0
+
+def _cmd_compact(args):
+    old_size, new_size = compact(args.archive, args.output)
+    print(f"{old_size:,} -> {new_size:,} bytes, reclaimed {old_size - new_size:,} bytes "
+          f"-> {args.output or args.archive}", file=sys.stderr)
+    return 0
+
+def _cmd_diff(args):
+    result = diff(args.old, args.new, args.workers)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=1))
+    else:
+        for name, size in result['removed']:
+            print(f"D  {name} (-{size:,})")
+        for name, size in result['added']:
+            print(f"A  {name} (+{size:,})")
+        for name, old_size, new_size in result['changed']:
+            print(f"M  {name} ({old_size:,} -> {new_size:,}, {new_size - old_size:+,})")
+        for old_name, new_name, size in result['moved']:
+            print(f"R  {old_name} -> {new_name} ({size:,})")
+
+    delta = (sum(size for _, size in result['added']) - sum(size for _, size in result['removed'])
+             + sum(new_size - old_size for _, old_size, new_size in result['changed']))
+    print(f"{len(result['added'])} added, {len(result['removed'])} removed, {len(result['changed'])} changed, "
+          f"{len(result['moved'])} moved, {result['unchanged']} unchanged ({delta:+,} bytes)", file=sys.stderr)
+    different = result['added'] or result['removed'] or result['changed'] or result['moved']
+    return 1 if different else 0
+
+def _cmd_make_patch(args):
+    with open(args.output, 'wb') as f:
+        copied, literal = make_patch(args.old, args.new, f, delta=args.delta, block_size=args.block_size,
+                                     workers=args.workers)
+        size = f.tell()
+    print(f"{copied:,} bytes by reference, {literal:,} bytes included, patch {size:,} bytes -> {args.output}",
+          file=sys.stderr)
+    return 0
+
+def _cmd_apply_patch(args):
+    output = args.output or args.old
+    size = apply_patch(args.old, args.patch, output)
+    print(f"{size:,} bytes -> {output}", file=sys.stderr)
+    return 0
+
+def _positive_int(value):
+    """argparse 타입: 1 이상의 정수"""
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be positive: {value}")
+    return number
+
+def build_parser():
+    """명령줄 인자 파서 생성"""
+    parser = argparse.ArgumentParser(prog='brarchive', description="brarchive 파일 도구")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('info', help="아카이브 헤더 정보 출력")
+    p.add_argument('archive')
+    p.set_defaults(func=_cmd_info)
+
+    p = sub.add_parser('list', help="엔트리 목록 출력")
+    p.add_argument('archive')
+    p.add_argument('directory', nargs='?', help="이 디렉토리 아래 엔트리만 출력")
+    p.add_argument('-l', '--long', action='store_true', help="크기와 오프셋도 출력")
+    p.set_defaults(func=_cmd_list)
+
+    p = sub.add_parser('extract', help="엔트리를 디렉토리에 추출")
+    p.add_argument('archive')
+    p.add_argument('names', nargs='*', help="추출할 엔트리 (생략 시 전체)")
+    p.add_argument('-o', '--output', default='.', help="출력 디렉토리 (기본: 현재 디렉토리)")
+    p.add_argument('-i', '--include', action='append', metavar='PATTERN',
+                   help="이 glob 패턴과 일치하는 엔트리만 추출 (반복 가능, 예: 'textures/**/*.png')")
+    p.add_argument('--regex', action='store_true', help="--include 패턴을 정규식으로 해석")
+    p.add_argument('-j', '--workers', type=int, default=None, help="복사 스레드 수 (기본: CPU 수)")
+    p.set_defaults(func=_cmd_extract)
+
+    p = sub.add_parser('encode', help="파일/디렉토리를 아카이브로 인코딩")
+    p.add_argument('inputs', nargs='+')
+    p.add_argument('-o', '--output', required=True, help="출력 .brarchive 파일")
+    p.add_argument('-d', '--dedup', action='store_true', help="같은 내용의 파일은 한 번만 저장")
+    p.add_argument('-j', '--workers', type=int, default=None, help="해시 스레드 수 (--dedup)")
+    p.set_defaults(func=_cmd_encode)
+
+    p = sub.add_parser('update', help="아카이브를 제자리에서 수정 (엔트리 추가/교체/삭제)")
+    p.add_argument('archive')
+    p.add_argument('inputs', nargs='*', help="추가/교체할 파일 또는 디렉토리 (encode와 같은 이름 규칙)")
+    p.add_argument('-a', '--add', nargs=2, action='append', default=[], metavar=('NAME', 'PATH'),
+                   help="PATH 내용을 엔트리 NAME으로 추가/교체 (반복 가능)")
+    p.add_argument('-r', '--remove', action='append', default=[], metavar='NAME', help="삭제할 엔트리 (반복 가능)")
+    p.set_defaults(func=_cmd_update)
+
+    p = sub.add_parser('compact', help="틈과 버려진 내용을 없애고 아카이브를 다시 쓰기")
+    p.add_argument('archive')
+    p.add_argument('-o', '--output', default=None, help="출력 파일 (기본: 원본을 교체)")
+    p.set_defaults(func=_cmd_compact)
+
+    p = sub.add_parser('cat', help="엔트리 내용을 표준 출력으로 출력")
+    p.add_argument('archive')
+    p.add_argument('name')
+    p.set_defaults(func=_cmd_cat)
+
+    p = sub.add_parser('batch', help="여러 아카이브를 병렬로 추출")
+    p.add_argument('inputs', nargs='+', help="디렉토리 또는 glob 패턴 (예: 'packs/**/*.brarchive')")
+    p.add_argument('-o', '--output', required=True, help="출력 디렉토리")
+    p.add_argument('-j', '--workers', type=int, default=None, help="작업 프로세스 수 (기본: CPU 수)")
+    p.set_defaults(func=_cmd_batch)
+
+    p = sub.add_parser('validate', help="아카이브 구조 검사 (문제가 있으면 종료 코드 1)")
+    p.add_argument('archives', nargs='+')
+    p.add_argument('--limit', type=int, default=50, help="아카이브마다 출력할 최대 문제 수 (기본: 50)")
+    p.set_defaults(func=_cmd_validate)
+
+    p = sub.add_parser('diff', help="두 아카이브의 엔트리 비교 (다르면 종료 코드 1)")
+    p.add_argument('old')
+    p.add_argument('new')
+    p.add_argument('--json', action='store_true', help="결과를 JSON으로 출력")
+    p.add_argument('-j', '--workers', type=int, default=None, help="해시 스레드 수")
+    p.set_defaults(func=_cmd_diff)
+
+    p = sub.add_parser('make-patch', help="이전 버전에서 새 버전을 만드는 패치 생성")
+    p.add_argument('old')
+    p.add_argument('new')
+    p.add_argument('-o', '--output', required=True, help="출력 패치 파일")
+    p.add_argument('-d', '--delta', action='store_true', help="크게 바뀐 엔트리는 블록 단위 델타로 기록")
+    p.add_argument('-b', '--block-size', type=_positive_int, default=PATCH_BLOCK_SIZE,
+                   help=f"블록 델타의 블록 크기 (기본: {PATCH_BLOCK_SIZE})")
+    p.add_argument('-j', '--workers', type=int, default=None, help="해시 스레드 수")
+    p.set_defaults(func=_cmd_make_patch)
+
+    p = sub.add_parser('apply-patch', help="이전 버전에 패치를 적용해 새 버전 생성")
+    p.add_argument('old')
+    p.add_argument('patch')
+    p.add_argument('-o', '--output', default=None, help="출력 파일 (기본: 이전 버전을 교체)")
+    p.set_defaults(func=_cmd_apply_patch)
+
+    p = sub.add_parser('scan', help="여러 아카이브의 헤더만 읽어 요약 (JSON Lines/CSV)")
+    p.add_argument('inputs', nargs='+', help="아카이브 파일 또는 디렉토리 (재귀 탐색)")
+    p.add_argument('-t', '--tables', action='store_true',
+                   help="디스크립터 테이블도 읽어 내용 길이 합계와 콘텐츠 끝 위치 추가")
+    p.add_argument('-f', '--format', choices=['jsonl', 'csv'], default='jsonl', help="출력 형식 (기본: jsonl)")
+    p.add_argument('-j', '--workers', type=int, default=None, help="읽기 스레드 수")
+    p.set_defaults(func=_cmd_scan)
+
+    p = sub.add_parser('zip', help="아카이브를 ZIP 파일로 변환")
+    p.add_argument('archive')
+    p.add_argument('-o', '--output', required=True, help="출력 .zip 파일")
+    p.add_argument('--level', type=int, default=ZIP_DEFAULT_LEVEL, choices=range(10),
+                   metavar='0-9', help=f"DEFLATE 압축 수준 (기본: {ZIP_DEFAULT_LEVEL})")
+    p.add_argument('-j', '--workers', type=int, default=None, help="압축 스레드 수 (기본: CPU 수)")
+    p.set_defaults(func=_cmd_zip)
+
+    return parser
+
+def main(argv=None):
+    """명령줄 진입점"""
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,18 +3,21 @@
 brarchive 파일을 디코딩하는 Streamlit 웹 애플리케이션
 """
 import streamlit as st
-import struct
 import os
 import zipfile
 import tempfile
 from pathlib import Path
 import io
-from collections import defaultdict
+import hashlib
+import threading
+from functools import partial
+from collections import defaultdict, OrderedDict
 
-# brarchive 상수
-MAGIC = 0x267052A0B125277D
-ENTRY_NAME_LEN_MAX = 247
-VERSIONS = [1]
+from brarchive import (
+    BRArchiveReader, PathIndex, encode_brarchive,
+    write_zip, diff, check_limits, check_deadline, deadline_after,
+    HEADER_SIZE, DESCRIPTOR_SIZE, ZIP_DEFAULT_LEVEL,
+)
 
 # 페이지 설정
 st.set_page_config(
@@ -23,208 +26,312 @@ st.set_page_config(
     layout="wide"
 )
 
-def read_header(data, offset=0):
-    """헤더 읽기"""
-    magic = struct.unpack('<Q', data[offset:offset+8])[0]
-    if magic != MAGIC:
-        raise ValueError(f"Magic mismatch: expected {hex(MAGIC)}, got {hex(magic)}")
-    
-    entries = struct.unpack('<I', data[offset+8:offset+12])[0]
-    version = struct.unpack('<I', data[offset+12:offset+16])[0]
-    
-    if version not in VERSIONS:
-        raise ValueError(f"Unsupported version: {version}")
-    
-    return entries, version, offset + 16
+# 파일 트리에서 한 번에 표시할 항목 수
+TREE_PAGE_SIZE = 50
+# 파일 수가 이 이하일 때만 전체 파일 선택 드롭다운 표시
+SELECTBOX_MAX_FILES = 1000
 
-def read_entry_descriptor(data, offset):
-    """엔트리 디스크립터 읽기"""
-    name_len = struct.unpack('<B', data[offset:offset+1])[0]
-    
-    if name_len > ENTRY_NAME_LEN_MAX:
-        raise ValueError(f"Entry name too long: {name_len}")
-    
-    name = data[offset+1:offset+1+name_len].decode('utf-8')
-    contents_offset = struct.unpack('<I', data[offset+1+ENTRY_NAME_LEN_MAX:offset+1+ENTRY_NAME_LEN_MAX+4])[0]
-    contents_len = struct.unpack('<I', data[offset+1+ENTRY_NAME_LEN_MAX+4:offset+1+ENTRY_NAME_LEN_MAX+8])[0]
-    
-    next_offset = offset + 1 + ENTRY_NAME_LEN_MAX + 8
-    
-    return name, contents_offset, contents_len, next_offset
+# 폴더별 용량 트리맵에 표시할 최대 폴더 수
+TREEMAP_MAX_NODES = 500
 
-def decode_brarchive_to_dict(data):
-    """brarchive 파일을 딕셔너리로 디코딩 (Rust 라이브러리와 동일한 로직)"""
-    # 헤더 읽기
-    entries_count, version, header_end = read_header(data)
-    
-    # 엔트리 디스크립터들 읽기
-    entry_descriptors = []
-    offset = header_end
-    
-    for i in range(entries_count):
-        name, contents_offset, contents_len, next_offset = read_entry_descriptor(data, offset)
-        entry_descriptors.append((name, contents_offset, contents_len))
-        offset = next_offset
-    
-    # 콘텐츠 영역 시작 위치 (디스크립터들 뒤)
-    contents_start = offset
-    
-    # 각 파일 추출
-    files_dict = {}
-    for name, contents_offset, contents_len in entry_descriptors:
-        # 파일 내용 읽기
-        actual_offset = contents_start + contents_offset
-        file_contents = data[actual_offset:actual_offset + contents_len]
-        files_dict[name] = file_contents
-    
-    return files_dict, entries_count, version
-
-def create_zip_from_files(files_dict):
-    """파일 딕셔너리로부터 ZIP 파일 생성"""
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for name, contents in files_dict.items():
-            zip_file.writestr(name, contents)
-    zip_buffer.seek(0)
-    return zip_buffer
-
-def build_file_tree(files_dict):
-    """파일 딕셔너리를 트리 구조로 변환"""
-    tree = {}
-    
-    for file_path, content in files_dict.items():
-        # 경로를 분리
-        parts = file_path.replace('\\', '/').split('/')
-        current = tree
-        
-        # 디렉토리 구조 생성
-        for i, part in enumerate(parts[:-1]):
-            if part not in current:
-                current[part] = {}
-            current = current[part]
-        
-        # 파일 추가 (크기 정보 포함)
-        file_name = parts[-1]
-        file_size = len(content)
-        current[file_name] = {'_type': 'file', '_size': file_size, '_path': file_path}
-    
-    return tree
+# 준비된 ZIP을 보관할 최대 개수
+ZIP_CACHE_MAX = 4
+# 이 크기를 넘는 ZIP은 메모리 대신 임시 파일에 기록
+ZIP_SPOOL_MAX = 64 * 1024 * 1024
 
-def render_tree_ui(node, parent_path="", files_dict=None, selected_file=None, key_prefix="", selectable=True):
-    """트리 노드를 재귀적으로 Streamlit UI로 렌더링"""
-    # 디렉토리와 파일을 분리
-    dirs = {}
-    files = {}
-    
-    for key, value in sorted(node.items()):
-        if isinstance(value, dict):
-            if '_type' in value and value['_type'] == 'file':
-                files[key] = value
-            else:
-                dirs[key] = value
-        else:
-            dirs[key] = value
+# 업로드된 아카이브 제한 (공유 배포에서 손상되거나 악의적인 파일 하나가 워커를 붙잡지 않도록)
+UPLOAD_LIMITS = dict(
+    max_entries=200_000,
+    max_total_size=2 * 1024 * 1024 * 1024,
+    max_entry_size=512 * 1024 * 1024,
+)
+# 한 번의 실행에서 업로드 목록/통계를 만드는 데 쓸 수 있는 최대 시간 (초)
+DECODE_TIME_BUDGET = 20.0
+# ZIP 준비에 쓸 수 있는 최대 시간 (초)
+ZIP_TIME_BUDGET = 120.0
+
+def create_zip_from_files(files_dict, progress=None, level=ZIP_DEFAULT_LEVEL, deadline=None):
+    """파일 딕셔너리로부터 ZIP 파일 생성
+
+    결과는 ZIP_SPOOL_MAX를 넘으면 디스크로 넘어가는 임시 파일이다.
+    이미 압축된 형식(PNG, OGG 등)은 다시 압축하지 않고 저장한다.
+    progress(완료 수, 전체 수) 콜백을 주면 엔트리마다 호출한다.
+    deadline을 넘기면 TimeoutError로 중단한다.
+    """
+    zip_file = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX)
+    try:
+        write_zip(files_dict, zip_file, level=level, progress=progress, deadline=deadline)
+    except BaseException:
+        zip_file.close()
+        raise
+    zip_file.seek(0)
+    return zip_file
+
+def file_icon(file_name):
+    """파일 타입 아이콘"""
+    file_ext = Path(file_name).suffix.lower()
+    if file_ext in ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.tga']:
+        return "🖼️"
+    elif file_ext == '.json':
+        return "📄"
+    elif file_ext in ['.txt', '.lang', '.md']:
+        return "📝"
+    return "📦"
+
+def render_pager(total, key):
+    """페이지 이동 버튼을 표시하고 현재 페이지의 (시작, 끝) 범위 반환"""
+    page_key = f"{key}_page"
+    pages = max(1, (total + TREE_PAGE_SIZE - 1) // TREE_PAGE_SIZE)
+    page = min(st.session_state.get(page_key, 0), pages - 1)
     
-    # 디렉토리 먼저 표시
-    for dir_name, dir_content in dirs.items():
-        full_path = f"{parent_path}/{dir_name}" if parent_path else dir_name
-        with st.expander(f"📁 {dir_name}", expanded=False):
-            render_tree_ui(dir_content, full_path, files_dict, selected_file, f"{key_prefix}_{dir_name}", selectable)
+    if pages > 1:
+        col_prev, col_info, col_next = st.columns([1, 2, 1])
+        with col_prev:
+            if st.button("◀", key=f"{key}_prev", disabled=page == 0):
+                st.session_state[page_key] = page - 1
+                st.rerun()
+        with col_info:
+            st.caption(f"{page + 1} / {pages} 페이지 ({total:,}개)")
+        with col_next:
+            if st.button("▶", key=f"{key}_next", disabled=page >= pages - 1):
+                st.session_state[page_key] = page + 1
+                st.rerun()
     
-    # 파일 표시
-    for file_name, file_info in files.items():
-        if isinstance(file_info, dict) and '_type' in file_info:
-            file_path = file_info.get('_path', file_name)
-            
-            # 파일 타입 아이콘
-            file_ext = Path(file_name).suffix.lower()
-            if file_ext in ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.tga']:
-                icon = "🖼️"
-            elif file_ext == '.json':
-                icon = "📄"
-            elif file_ext in ['.txt', '.lang', '.md']:
-                icon = "📝"
-            else:
-                icon = "📦"
-            
-            # 파일 선택 버튼 또는 단순 표시
-            if selectable:
-                if st.button(f"{icon} {file_name}", key=f"file_btn_{key_prefix}_{file_name}"):
-                    st.session_state['selected_file'] = file_path
-                    st.rerun()
-            else:
-                st.markdown(f"{icon} {file_name}")
-        else:
-            file_path = file_name if not parent_path else f"{parent_path}/{file_name}"
-            if selectable:
-                if st.button(f"📄 {file_name}", key=f"file_btn_{key_prefix}_{file_name}"):
-                    st.session_state['selected_file'] = file_path
-                    st.rerun()
-            else:
-                st.markdown(f"📄 {file_name}")
+    start = page * TREE_PAGE_SIZE
+    return start, min(start + TREE_PAGE_SIZE, total)
 
-def encode_brarchive(files_dict):
-    """파일 딕셔너리를 brarchive 형식으로 인코딩"""
-    # 헤더 작성
-    buf = bytearray()
-    
-    # Magic (8 bytes)
-    buf.extend(struct.pack('<Q', MAGIC))
+def render_file_entry(label, file_path, key, selectable):
+    """파일 한 줄 표시 (선택 가능하면 버튼)"""
+    if selectable:
+        if st.button(label, key=key):
+            st.session_state['selected_file'] = file_path
+            st.rerun()
+    else:
+        st.markdown(label)
+
+def render_tree_browser(index, key, selectable=True):
+    """경로 인덱스를 열린 디렉토리 하나씩 렌더링
+
+    현재 디렉토리의 자식만 TREE_PAGE_SIZE개씩 위젯으로 만들고, 하위 디렉토리는
+    클릭했을 때 연다. 이름 필터를 입력하면 전체 경로에서 검색한 결과를 보여준다.
+    """
+    dir_key = f"{key}_dir"
     
-    # Entries count (4 bytes)
-    entries_count = len(files_dict)
-    buf.extend(struct.pack('<I', entries_count))
+    # 이름 필터 (입력하면 트리 대신 검색 결과 표시)
+    query = st.text_input("이름 필터", key=f"{key}_filter", placeholder="예: textures/ 또는 .png")
+    if query:
+        needle = query.lower()
+        matches = [pos for pos, path in enumerate(index.paths) if needle in path.lower()]
+        if not matches:
+            st.caption("일치하는 파일이 없습니다.")
+            return
+        start, end = render_pager(len(matches), f"{key}_search")
+        for pos in matches[start:end]:
+            file_path = index.names[pos]
+            render_file_entry(f"{file_icon(file_path)} {index.paths[pos]}", file_path, f"{key}_s_{file_path}", selectable)
+        return
     
-    # Version (4 bytes)
-    buf.extend(struct.pack('<I', 1))
+    # 현재 디렉토리 (없어진 경로면 루트로)
+    path = st.session_state.get(dir_key, "")
+    if path and not index.is_dir(path):
+        path = ""
     
-    # 엔트리 디스크립터들 작성
-    descriptors = []
-    current_offset = 0
+    if path:
+        col_up, col_path = st.columns([1, 3])
+        with col_up:
+            if st.button("⬆ 상위", key=f"{key}_up"):
+                st.session_state[dir_key] = path.rpartition('/')[0]
+                st.session_state[f"{key}_page"] = 0
+                st.rerun()
+        with col_path:
+            st.caption("📂 " + path)
     
-    for name, content in sorted(files_dict.items()):  # 정렬하여 일관성 유지
-        name_bytes = name.encode('utf-8')
-        name_len = len(name_bytes)
+    # 디렉토리 먼저, 그다음 파일
+    dirs, files = index.listdir(path)
+    children = [(True, name) for name in dirs] + [(False, pos) for pos in files]
+    start, end = render_pager(len(children), key)
+    for is_dir, child in children[start:end]:
+        if not is_dir:
+            file_path = index.names[child]
+            file_name = index.paths[child].rpartition('/')[2]
+            render_file_entry(f"{file_icon(file_name)} {file_name}", file_path, f"{key}_f_{file_path}", selectable)
+            continue
         
-        if name_len > ENTRY_NAME_LEN_MAX:
-            raise ValueError(f"Entry name too long: {name_len}")
-        
-        content_len = len(content)
+        child_path = f"{path}/{child}" if path else child
+        if st.button(f"📁 {child} ({index.count(child_path):,})", key=f"{key}_d_{child_path}"):
+            st.session_state[dir_key] = child_path
+            st.session_state[f"{key}_page"] = 0
+            st.rerun()
+
+def build_file_list(archive, deadline=None):
+    """파일 목록 테이블 데이터 생성 (이름, 크기, 타입)"""
+    file_list_data = []
+    image_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.tga']
+    for name, content in archive.items():
+        check_deadline(deadline)
+        file_ext = Path(name).suffix.lower()
+        if file_ext in image_extensions:
+            file_type = "이미지"
+        elif name.endswith('.json'):
+            file_type = "JSON"
+        else:
+            try:
+                # 텍스트 파일인지 확인
+                bytes(content[:100]).decode('utf-8')
+                file_type = "텍스트"
+            except:
+                file_type = "바이너리"
         
-        descriptors.append({
-            'name': name_bytes,
-            'name_len': name_len,
-            'offset': current_offset,
-            'length': content_len
+        file_list_data.append({
+            "파일명": name,
+            "크기 (bytes)": len(content),
+            "타입": file_type
         })
-        
-        current_offset += content_len
-    
-    # 디스크립터들 쓰기
-    for desc in descriptors:
-        # Name length (1 byte)
-        buf.append(desc['name_len'])
-        # Name (247 bytes, 패딩 포함)
-        name_buf = bytearray(ENTRY_NAME_LEN_MAX)
-        name_buf[:desc['name_len']] = desc['name']
-        buf.extend(name_buf)
-        # Contents offset (4 bytes)
-        buf.extend(struct.pack('<I', desc['offset']))
-        # Contents length (4 bytes)
-        buf.extend(struct.pack('<I', desc['length']))
+    return file_list_data
+
+def upload_digest(uploaded_file):
+    """업로드 내용 해시 (같은 업로드에 대해서는 세션 안에서 한 번만 계산)"""
+    digests = st.session_state.setdefault('upload_digests', {})
+    if uploaded_file.file_id not in digests:
+        digests[uploaded_file.file_id] = hashlib.blake2b(uploaded_file.getbuffer(), digest_size=16).hexdigest()
+    return digests[uploaded_file.file_id]
+
+def build_dir_table(dir_stats):
+    """폴더별 용량 테이블 데이터 생성 (큰 폴더부터)"""
+    rows = []
+    for directory, entry in sorted(dir_stats.items(), key=lambda item: (-item[1]['bytes'], item[0])):
+        rows.append({
+            "폴더": directory or "/",
+            "총 크기 (bytes)": entry['bytes'],
+            "파일 수": entry['entries'],
+            "가장 큰 파일": entry['largest'],
+            "가장 큰 파일 크기 (bytes)": entry['largest_size'],
+        })
+    return rows
+
+def build_diff_table(result):
+    """비교 결과 테이블 데이터 생성 (상태, 파일명, 이전/새 크기, 차이)"""
+    rows = []
+    for name, size in result['added']:
+        rows.append({"상태": "추가", "파일명": name, "이전 크기": None, "새 크기": size, "차이 (bytes)": size})
+    for name, size in result['removed']:
+        rows.append({"상태": "삭제", "파일명": name, "이전 크기": size, "새 크기": None, "차이 (bytes)": -size})
+    for name, old_size, new_size in result['changed']:
+        rows.append({"상태": "변경", "파일명": name, "이전 크기": old_size, "새 크기": new_size,
+                     "차이 (bytes)": new_size - old_size})
+    for old_name, new_name, size in result['moved']:
+        rows.append({"상태": "이동", "파일명": f"{old_name} → {new_name}", "이전 크기": size, "새 크기": size,
+                     "차이 (bytes)": 0})
+    return rows
+
+def render_size_treemap(dir_stats, root_label):
+    """폴더별 용량 트리맵 (plotly가 없으면 상위 폴더 막대 그래프)
+
+    노드가 많으면 큰 폴더 TREEMAP_MAX_NODES개만 표시한다. 부모 폴더는 항상
+    자식보다 크거나 같으므로 크기순으로 자르면 부모가 빠지지 않는다.
+    """
+    top = sorted(dir_stats, key=lambda d: (-dir_stats[d]['bytes'], d.count('/') if d else -1))
+    top = top[:TREEMAP_MAX_NODES]
     
-    # 콘텐츠 영역 쓰기
-    for name, content in sorted(files_dict.items()):
-        buf.extend(content)
+    try:
+        import plotly.graph_objects as go
+    except ImportError:
+        st.caption("plotly가 설치되어 있지 않아 상위 폴더 막대 그래프로 표시합니다.")
+        st.bar_chart({d or "/": dir_stats[d]['bytes'] for d in top[1:21]})
+        return
     
-    return bytes(buf)
+    fig = go.Figure(go.Treemap(
+        ids=[d or "/" for d in top],
+        labels=[d.rpartition('/')[2] if d else root_label for d in top],
+        parents=["" if not d else (d.rpartition('/')[0] or "/") for d in top],
+        values=[dir_stats[d]['bytes'] for d in top],
+        customdata=[dir_stats[d]['entries'] for d in top],
+        branchvalues="total",
+        hovertemplate="%{id}<br>%{value:,} bytes<br>파일 %{customdata:,}개<extra></extra>",
+    ))
+    fig.update_layout(margin=dict(t=10, l=10, r=10, b=10))
+    st.plotly_chart(fig, use_container_width=True)
+
+# 디코딩 결과 캐시 (내용 해시 기준, 재실행/세션 간 공유)
+# '_'로 시작하는 인자는 Streamlit이 해시하지 않음
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def load_archive(content_hash, _uploaded_file):
+    """업로드를 임시 파일로 옮겨 mmap 리더로 열기
+
+    UPLOAD_LIMITS를 넘거나 아카이브 밖을 가리키는 엔트리가 있으면 바로 거부한다.
+    (예외는 캐시되지 않으므로 거부된 리더는 닫는다)
+    """
+    with tempfile.TemporaryFile() as f:
+        f.write(_uploaded_file.getbuffer())
+        f.flush()
+        archive = BRArchiveReader(f)
+    try:
+        check_limits(archive, **UPLOAD_LIMITS)
+    except Exception:
+        archive.close()
+        raise
+    return archive
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def cached_file_list(content_hash, _archive, _deadline=None):
+    """아카이브 파일 목록 테이블 캐시"""
+    return build_file_list(_archive, _deadline)
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def cached_dir_table(content_hash, _archive):
+    """폴더별 용량 테이블 캐시"""
+    return build_dir_table(_archive.directory_stats())
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def cached_diff(old_hash, new_hash, _old, _new):
+    """두 아카이브 비교 결과 캐시"""
+    return diff(_old, _new)
+
+@st.cache_resource
+def prepared_zips():
+    """(내용 해시, 압축 수준) -> 준비된 ZIP 임시 파일 (프로세스 전체에서 공유, 최근 것만 유지)"""
+    return OrderedDict()
+
+@st.cache_resource
+def prepared_zips_lock():
+    """준비된 ZIP 임시 파일을 여러 스레드에서 읽을 때 쓰는 잠금"""
+    return threading.Lock()
+
+def prepare_zip(zip_key, archive, level):
+    """ZIP을 진행률 표시와 함께 생성하고 캐시에 저장"""
+    bar = st.progress(0.0, text="ZIP 파일을 만드는 중...")
+    step = max(1, len(archive) // 100)
+
+    def report(done, total):
+        if done % step == 0 or done == total:
+            bar.progress(done / total, text=f"ZIP 파일을 만드는 중... ({done:,}/{total:,})")
+
+    try:
+        zip_file = create_zip_from_files(archive, progress=report, level=level,
+                                         deadline=deadline_after(ZIP_TIME_BUDGET))
+    finally:
+        bar.empty()
+
+    zips = prepared_zips()
+    with prepared_zips_lock():
+        zips[zip_key] = zip_file
+        while len(zips) > ZIP_CACHE_MAX:
+            zips.popitem(last=False)[1].close()
+    return zip_file
+
+def read_prepared_zip(zip_file):
+    """다운로드 버튼 콜백: 준비된 ZIP 내용 읽기 (클릭할 때만 실행)"""
+    with prepared_zips_lock():
+        zip_file.seek(0)
+        return zip_file.read()
 
 # 메인 UI
 st.title("📦 BRArchive 디코더/인코더")
 st.markdown("---")
 
 # 탭 생성
-tab1, tab2 = st.tabs(["디코딩", "인코딩"])
+tab1, tab2, tab3 = st.tabs(["디코딩", "인코딩", "비교"])
 
 with tab1:
     # 파일 업로드
@@ -244,12 +351,12 @@ with tab1:
 
     if uploaded_file is not None:
         try:
-            # 파일 읽기
-            data = uploaded_file.read()
-            
-            # 디코딩
+            # 디코딩 (내용 해시별로 캐시되므로 재실행 시에는 다시 디코딩하지 않음)
             with st.spinner("파일을 디코딩하는 중..."):
-                files_dict, entries_count, version = decode_brarchive_to_dict(data)
+                deadline = deadline_after(DECODE_TIME_BUDGET)
+                content_hash = upload_digest(uploaded_file)
+                archive = load_archive(content_hash, uploaded_file)
+                entries_count, version = archive.entries_count, archive.version
             
             if entries_count == 0:
                 st.warning("이 아카이브는 빈 아카이브입니다. (파일이 0개)")
@@ -257,31 +364,31 @@ with tab1:
                 st.success(f"디코딩 완료! (파일 수: {entries_count}, 버전: {version})")
             
             # 사이드바에 파일 목록 표시 (트리 구조)
-            if len(files_dict) > 0:
+            if len(archive) > 0:
                 with st.sidebar:
                     st.header("파일 목록")
                     
                     # 세션 상태에서 선택된 파일 가져오기
                     if 'selected_file' not in st.session_state:
-                        st.session_state['selected_file'] = list(files_dict.keys())[0]
+                        st.session_state['selected_file'] = archive.names()[0]
                     
-                    # 트리 구조 생성 및 표시
-                    file_tree = build_file_tree(files_dict)
+                    # 트리 UI 렌더링 (정렬 경로 인덱스는 캐시된 리더에 함께 보관됨)
+                    render_tree_browser(archive.path_index(), key="decode_tree")
                     
-                    # 트리 UI 렌더링
-                    render_tree_ui(file_tree, files_dict=files_dict, selected_file=st.session_state.get('selected_file'))
+                    # 선택된 파일 (다른 아카이브의 파일이면 첫 파일로)
+                    selected_file = st.session_state.get('selected_file')
+                    if selected_file not in archive:
+                        selected_file = archive.names()[0]
                     
-                    # 선택된 파일
-                    selected_file = st.session_state.get('selected_file', list(files_dict.keys())[0])
-                    
-                    # 파일 선택 드롭다운 (대체 방법)
-                    st.markdown("---")
-                    selected_file = st.selectbox(
-                        "또는 여기서 선택",
-                        options=list(files_dict.keys()),
-                        index=list(files_dict.keys()).index(selected_file) if selected_file in files_dict.keys() else 0,
-                        key="file_selector"
-                    )
+                    # 파일 선택 드롭다운 (대체 방법, 파일이 많으면 필터 사용)
+                    if len(archive) <= SELECTBOX_MAX_FILES:
+                        st.markdown("---")
+                        selected_file = st.selectbox(
+                            "또는 여기서 선택",
+                            options=archive.names(),
+                            index=archive.names().index(selected_file),
+                            key="file_selector"
+                        )
             else:
                 st.info("이 아카이브에는 파일이 없습니다.")
                 selected_file = None
@@ -294,7 +401,7 @@ with tab1:
                     st.subheader(f"{selected_file}")
                     
                     # 파일 내용 표시 (expander로 접기/펼치기 가능)
-                    file_content = files_dict[selected_file]
+                    file_content = bytes(archive.get(selected_file))
                     
                     # 이미지 파일인지 확인
                     is_image = False
@@ -354,7 +461,7 @@ with tab1:
                     st.metric("총 파일 수", entries_count)
                     st.metric("아카이브 버전", version)
                     if selected_file is not None:
-                        st.metric("선택된 파일 크기", f"{len(files_dict[selected_file]):,} bytes")
+                        st.metric("선택된 파일 크기", f"{archive.size(selected_file):,} bytes")
             
             # 전체 다운로드 및 파일 목록
             st.markdown("---")
@@ -362,48 +469,51 @@ with tab1:
             
             with col_download:
                 st.subheader("다운로드")
-                if len(files_dict) > 0:
-                    zip_buffer = create_zip_from_files(files_dict)
-                    # 파일명에서 확장자 제거 (대소문자 무시)
-                    base_name = Path(uploaded_file.name).stem
-                    st.download_button(
-                        label="전체 파일 ZIP 다운로드",
-                        data=zip_buffer,
-                        file_name=f"{base_name}_decoded.zip",
-                        mime="application/zip"
+                if len(archive) > 0:
+                    zip_level = st.select_slider(
+                        "ZIP 압축 수준",
+                        options=list(range(10)),
+                        value=ZIP_DEFAULT_LEVEL,
+                        help="PNG, JPG, OGG 등 이미 압축된 파일은 수준과 관계없이 압축하지 않고 저장합니다",
+                        key="zip_level"
                     )
+                    
+                    # ZIP은 요청할 때만 만들고, 만든 뒤에는 내용 해시별로 재사용
+                    zip_key = (content_hash, zip_level)
+                    zip_file = prepared_zips().get(zip_key)
+                    if zip_file is None and st.button("전체 파일 ZIP 준비", key="prepare_zip"):
+                        prepare_zip(zip_key, archive, zip_level)
+                        st.rerun()
+                    
+                    if zip_file is not None:
+                        # 파일명에서 확장자 제거 (대소문자 무시)
+                        base_name = Path(uploaded_file.name).stem
+                        st.download_button(
+                            label="전체 파일 ZIP 다운로드",
+                            data=partial(read_prepared_zip, zip_file),
+                            file_name=f"{base_name}_decoded.zip",
+                            mime="application/zip"
+                        )
                 else:
                     st.info("다운로드할 파일이 없습니다.")
             
             # 파일 목록 테이블
-            if len(files_dict) > 0:
+            if len(archive) > 0:
                 st.markdown("---")
                 st.subheader("모든 파일 목록")
                 
-                file_list_data = []
-                image_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.tga']
-                for name, content in files_dict.items():
-                    file_ext = Path(name).suffix.lower()
-                    if file_ext in image_extensions:
-                        file_type = "이미지"
-                    elif name.endswith('.json'):
-                        file_type = "JSON"
-                    else:
-                        try:
-                            # 텍스트 파일인지 확인
-                            content[:100].decode('utf-8')
-                            file_type = "텍스트"
-                        except:
-                            file_type = "바이너리"
-                    
-                    file_list_data.append({
-                        "파일명": name,
-                        "크기 (bytes)": len(content),
-                        "타입": file_type
-                    })
-                
+                file_list_data = cached_file_list(content_hash, archive, deadline)
                 st.dataframe(file_list_data, use_container_width=True)
+                
+                # 폴더별 용량 (디코딩 시 한 번 계산되어 아카이브와 함께 캐시됨)
+                st.markdown("---")
+                st.subheader("폴더별 용량")
+                dir_stats = archive.directory_stats()
+                render_size_treemap(dir_stats, Path(uploaded_file.name).stem)
+                st.dataframe(cached_dir_table(content_hash, archive), use_container_width=True)
             
+        except TimeoutError:
+            st.error("❌ 처리 시간 제한을 초과했습니다. 아카이브가 너무 크거나 손상되었을 수 있습니다.")
         except Exception as e:
             st.error(f"❌ 오류 발생: {str(e)}")
             st.exception(e)
@@ -476,10 +586,10 @@ with tab2:
         st.subheader("업로드된 파일 목록")
         
         # 트리 구조로 표시
-        file_tree = build_file_tree(files_dict)
+        file_index = PathIndex(list(files_dict), lengths=[len(c) for c in files_dict.values()])
         
         with st.expander("파일 트리 보기", expanded=True):
-            render_tree_ui(file_tree, files_dict=files_dict, selectable=False)
+            render_tree_browser(file_index, key="encode_tree", selectable=False)
         
         # 테이블 형태로도 표시
         st.markdown("---")
@@ -500,10 +610,11 @@ with tab2:
         st.dataframe(file_list, use_container_width=True)
         
         # 인코딩 버튼
+        dedup = st.checkbox("같은 내용의 파일은 한 번만 저장 (중복 제거)", value=False, key="encode_dedup")
         if st.button("BRArchive로 인코딩", type="primary"):
             try:
                 with st.spinner("파일을 인코딩하는 중..."):
-                    archive_data = encode_brarchive(files_dict)
+                    archive_data = encode_brarchive(files_dict, dedup=dedup)
                 
                 st.success(f"✅ 인코딩 완료! (파일 수: {len(files_dict)}, 크기: {len(archive_data):,} bytes)")
                 
@@ -517,6 +628,10 @@ with tab2:
                     compression_ratio = (1 - len(archive_data) / total_original) * 100 if total_original > 0 else 0
                     st.metric("원본 총 크기", f"{total_original:,} bytes")
                     st.metric("압축률", f"{compression_ratio:.1f}%")
+                if dedup:
+                    # 중복 제거 없이 인코딩했을 때 크기와의 차이
+                    full_size = HEADER_SIZE + DESCRIPTOR_SIZE * len(files_dict) + total_original
+                    st.metric("중복 제거로 절약한 크기", f"{full_size - len(archive_data):,} bytes")
                 
                 # 다운로드 버튼
                 st.markdown("---")
@@ -563,3 +678,44 @@ with tab2:
     else:
         st.info("👆 위에서 인코딩할 파일들을 업로드하세요")
 
+with tab3:
+    st.header("BRArchive 비교")
+    st.markdown("---")
+
+    col_old, col_new = st.columns(2)
+    with col_old:
+        old_file = st.file_uploader("이전 버전", type=None, key="diff_old_uploader")
+    with col_new:
+        new_file = st.file_uploader("새 버전", type=None, key="diff_new_uploader")
+
+    if old_file is not None and new_file is not None:
+        invalid = [f.name for f in (old_file, new_file) if Path(f.name).suffix.lower() != '.brarchive']
+        if invalid:
+            st.error(f"❌ .brarchive 파일만 비교할 수 있습니다. (업로드된 파일: {', '.join(invalid)})")
+        else:
+            try:
+                # 이름/크기를 먼저 비교하고 크기가 같은 엔트리만 해시 (결과는 두 내용 해시별로 캐시)
+                with st.spinner("아카이브를 비교하는 중..."):
+                    old_hash, new_hash = upload_digest(old_file), upload_digest(new_file)
+                    result = cached_diff(old_hash, new_hash,
+                                         load_archive(old_hash, old_file), load_archive(new_hash, new_file))
+
+                diff_table = build_diff_table(result)
+                size_delta = sum(row["차이 (bytes)"] for row in diff_table)
+                cols = st.columns(6)
+                cols[0].metric("추가", len(result['added']))
+                cols[1].metric("삭제", len(result['removed']))
+                cols[2].metric("변경", len(result['changed']))
+                cols[3].metric("이동", len(result['moved']))
+                cols[4].metric("동일", result['unchanged'])
+                cols[5].metric("크기 변화", f"{size_delta:+,} bytes")
+
+                if diff_table:
+                    st.dataframe(diff_table, use_container_width=True)
+                else:
+                    st.success("두 아카이브의 내용이 같습니다.")
+            except Exception as e:
+                st.error(f"❌ 비교 오류: {str(e)}")
+                st.exception(e)
+    else:
+        st.info("👆 비교할 두 brarchive 파일을 업로드하세요")
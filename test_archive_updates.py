@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+제자리 수정(ArchiveUpdater)과 compact 왕복 검사
+
+무작위 아카이브에 추가/교체/삭제(테이블 확장, 정렬되지 않은 테이블, 공유 구간 포함)를
+반복한 뒤 내용과 validate() 결과(교체로 생긴 틈은 허용)를 확인하고, compact 후에는
+문제가 하나도 없고 공유 구간도 유지돼야 한다. pytest로도 실행된다.
+
+    python test_archive_updates.py [시드] [반복 수]
+"""
+import os
+import random
+import sys
+import tempfile
+
+from brarchive import (
+    HEADER_SIZE, DESCRIPTOR_SIZE,
+    ArchiveUpdater, BRArchiveReader, compact, decode_brarchive_to_dict, encode_brarchive, validate,
+)
+
+
+def random_files(rng, count, max_size):
+    """f000, f001, ... 이름의 무작위 내용 딕셔너리 (일부는 같은 내용)"""
+    files = {}
+    for i in range(count):
+        if files and rng.random() < 0.2:
+            files[f"f{i:03d}"] = rng.choice(list(files.values()))
+        else:
+            files[f"f{i:03d}"] = rng.randbytes(rng.randint(0, max_size))
+    return files
+
+def unsort_table(data):
+    """디스크립터 순서를 뒤집은 아카이브 (내용 영역은 그대로)"""
+    with BRArchiveReader(data) as reader:
+        count = reader.entries_count
+    end = HEADER_SIZE + count * DESCRIPTOR_SIZE
+    descs = [data[pos:pos + DESCRIPTOR_SIZE] for pos in range(HEADER_SIZE, end, DESCRIPTOR_SIZE)]
+    return data[:HEADER_SIZE] + b''.join(reversed(descs)) + data[end:]
+
+def check_archive(path, expected, gaps=True):
+    """내용이 expected와 같고 validate() 문제가 없는지 (gaps=True면 교체/삭제로 생긴 틈은 허용)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert decode_brarchive_to_dict(data)[0] == expected
+    problems = [p for p in validate(data) if not (gaps and p[0] == 'gap')]
+    assert not problems, problems
+
+def random_archive(rng, path):
+    """무작위 아카이브를 path에 쓰고 내용 딕셔너리를 반환"""
+    files = random_files(rng, rng.randint(0, 6), 600)
+    data = encode_brarchive(files, dedup=rng.random() < 0.5)
+    if rng.random() < 0.3:
+        data = unsort_table(data)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return files
+
+def random_session(rng, path, files):
+    """ArchiveUpdater로 무작위 추가/교체/삭제 (files도 같이 갱신)"""
+    with ArchiveUpdater(path) as updater:
+        for _ in range(rng.randint(0, 6)):
+            if files and rng.random() < 0.35:
+                name = rng.choice(list(files))
+                del files[name]
+                updater.remove(name)
+            else:
+                # 새 이름이면 디스크립터 테이블이 커지고 앞쪽 내용이 옮겨짐
+                name = rng.choice(list(files) + [f"n{rng.randint(0, 50):02d}"])
+                files[name] = rng.randbytes(rng.randint(0, 400))
+                updater.put(name, files[name])
+            if rng.random() < 0.3:
+                updater.commit()
+        assert len(updater) == len(files)
+
+def shared_groups(path):
+    """같은 구간을 공유하는 엔트리 이름 묶음"""
+    with BRArchiveReader(path) as reader:
+        table = reader.table
+        groups = {}
+        for i in range(len(table)):
+            groups.setdefault((int(table.offsets[i]), int(table.lengths[i])), set()).add(table.name(i))
+    return sorted(sorted(names) for names in groups.values() if len(names) > 1)
+
+def run_updates(seed, trials, directory):
+    rng = random.Random(seed)
+    path = os.path.join(directory, 'update.brarchive')
+    for _ in range(trials):
+        files = random_archive(rng, path)
+        for _ in range(3):
+            random_session(rng, path, files)
+            check_archive(path, files)
+
+def run_compact(seed, trials, directory):
+    rng = random.Random(seed)
+    path = os.path.join(directory, 'compact.brarchive')
+    output = os.path.join(directory, 'compacted.brarchive')
+    for _ in range(trials):
+        files = random_archive(rng, path)
+        for _ in range(rng.randint(0, 3)):
+            random_session(rng, path, files)
+        shared = shared_groups(path)
+        size = os.path.getsize(path)
+
+        # 다른 경로로 쓰면 원본은 그대로, 기본값이면 제자리에서 교체
+        target = output if rng.random() < 0.5 else path
+        old_size, new_size = compact(path, None if target == path else target)
+        assert old_size == size and new_size == os.path.getsize(target) <= size
+        check_archive(target, files, gaps=False)
+        assert shared_groups(target) == shared
+        if target != path:
+            assert os.path.getsize(path) == size
+
+        # 이미 빈틈이 없으면 크기가 그대로
+        assert compact(target) == (new_size, new_size)
+    # 임시 파일이 남지 않음
+    assert not [name for name in os.listdir(directory) if name.startswith('.compact-')]
+
+def test_update_round_trip(tmp_path):
+    run_updates(0, 100, tmp_path)
+
+def test_compact(tmp_path):
+    run_compact(0, 100, tmp_path)
+
+def main(argv):
+    seed = int(argv[0]) if argv else random.randrange(1 << 32)
+    trials = int(argv[1]) if len(argv) > 1 else 300
+    with tempfile.TemporaryDirectory() as directory:
+        run_updates(seed, trials, directory)
+        run_compact(seed, trials, directory)
+    print(f"ok (seed {seed}, {trials} trials)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+extract 엔트리 선택 패턴(match_entries) 검사
+
+glob의 '*', '**', 문자 클래스와 정규식(인라인 플래그 포함), 잘못된 패턴의
+오류 처리(명령줄에서 트레이스백 없이 error: 출력)를 확인한다.
+"""
+import os
+
+import pytest
+
+from brarchive import BRArchiveReader, encode_brarchive, main, match_entries
+
+
+NAMES = [
+    'manifest.json',
+    'textures/a.png',
+    'textures/blocks/Stone.PNG',
+    'textures/blocks/dirt.png',
+    'texts/en_US.lang',
+]
+
+
+def matched(patterns, regex=False):
+    with BRArchiveReader(encode_brarchive({name: name.encode('utf-8') for name in NAMES})) as reader:
+        return sorted(reader.table.name(i) for i in match_entries(reader, patterns, regex))
+
+def test_glob():
+    assert matched(['textures/*.png']) == ['textures/a.png']
+    assert matched(['textures/**/*.png']) == ['textures/a.png', 'textures/blocks/dirt.png']
+    assert matched(['*.json', 'texts/*']) == ['manifest.json', 'texts/en_US.lang']
+    assert matched(['textures/blocks/[!d]*']) == ['textures/blocks/Stone.PNG']
+
+def test_regex():
+    assert matched([r'\.lang$'], regex=True) == ['texts/en_US.lang']
+    # 인라인 전역 플래그는 패턴마다 따로 컴파일해야 다른 패턴과 함께 쓸 수 있음
+    assert matched(['(?i)stone', r'\.json$'], regex=True) == ['manifest.json', 'textures/blocks/Stone.PNG']
+    assert matched([r'\.png$', r'(?i)\.PNG$'], regex=True) == [
+        'textures/a.png', 'textures/blocks/Stone.PNG', 'textures/blocks/dirt.png']
+
+def test_invalid_pattern():
+    with pytest.raises(ValueError, match="Invalid pattern '\\['"):
+        matched(['['], regex=True)
+    with pytest.raises(ValueError, match='Invalid pattern'):
+        matched(['[z-a]'])
+
+def test_cli(tmp_path, capsys):
+    archive = tmp_path / 'pack.brarchive'
+    archive.write_bytes(encode_brarchive({name: name.encode('utf-8') for name in NAMES}))
+    out = tmp_path / 'out'
+
+    assert main(['extract', str(archive), '-o', str(out), '--regex', '-i', '(?i)A']) == 0
+    extracted = sorted(os.path.relpath(os.path.join(d, f), out).replace(os.sep, '/')
+                       for d, _, files in os.walk(out) for f in files)
+    assert extracted == sorted(name for name in NAMES if 'a' in name.lower())
+
+    capsys.readouterr()
+    assert main(['extract', str(archive), '-o', str(out), '--regex', '-i', '[']) == 1
+    assert capsys.readouterr().err.startswith("error: Invalid pattern '['")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+패치(make_patch, apply_patch) 왕복 검사
+
+무작위로 바꾼 아카이브(이름 변경, 공유 구간, compact 전 틈 포함)에 대해 블록 델타를
+쓰거나 쓰지 않고 패치를 만들고, 적용 결과가 새 아카이브와 바이트 단위로 같은지
+확인한다. 다른 아카이브에 적용하거나 손상된(변조, 잘림, 뒤에 붙은 데이터) 패치는
+출력을 남기지 않고 ValueError로 거부돼야 한다. pytest로도 실행된다.
+
+    python test_patches.py [시드] [반복 수]
+"""
+import os
+import random
+import sys
+import tempfile
+
+from brarchive import PATCH_DELTA_MIN, ArchiveUpdater, apply_patch, encode_brarchive, make_patch
+from test_archive_updates import random_files
+
+
+def write_pair(rng, trial, old_path, new_path):
+    """무작위 이전 아카이브와, 그것을 바꾼 새 아카이브 쓰기"""
+    files = random_files(rng, rng.randint(0, 5), 3000)
+    if rng.random() < 0.2:
+        files['big.bin'] = rng.randbytes(PATCH_DELTA_MIN + rng.randint(0, 4096))
+    with open(old_path, 'wb') as f:
+        f.write(encode_brarchive(files, dedup=rng.random() < 0.5))
+
+    changed = dict(files)
+    for name in list(changed)[:2]:
+        contents = bytearray(changed[name])
+        if contents:
+            contents[rng.randrange(len(contents))] ^= 1
+        changed[name] = bytes(contents) + rng.randbytes(rng.randint(0, 100))
+    changed[f"new{trial}"] = rng.randbytes(rng.randint(0, 2000))
+    if rng.random() < 0.3 and files:
+        changed['renamed'] = changed.pop(rng.choice(list(files)))
+    with open(new_path, 'wb') as f:
+        f.write(encode_brarchive(changed, dedup=rng.random() < 0.5))
+    if rng.random() < 0.3:
+        # 틈과 공유 구간이 있는 (compact 전) 아카이브도 그대로 재현해야 함
+        with ArchiveUpdater(new_path) as updater:
+            updater.put(f"new{trial}", b'replaced')
+
+def run_patches(seed, trials, directory):
+    rng = random.Random(seed)
+    old_path = os.path.join(directory, 'old.brarchive')
+    new_path = os.path.join(directory, 'new.brarchive')
+    patch_path = os.path.join(directory, 'update.patch')
+    out_path = os.path.join(directory, 'patched.brarchive')
+    for trial in range(trials):
+        write_pair(rng, trial, old_path, new_path)
+        with open(patch_path, 'wb') as f:
+            make_patch(old_path, new_path, f, delta=rng.random() < 0.5, block_size=rng.choice([16, 64, 4096]))
+        apply_patch(old_path, patch_path, out_path)
+        with open(out_path, 'rb') as f, open(new_path, 'rb') as g:
+            assert f.read() == g.read()
+
+    # 다른 아카이브에는 적용하지 않음
+    with open(old_path, 'wb') as f:
+        f.write(encode_brarchive({'other': b'x'}))
+    try:
+        apply_patch(old_path, patch_path, out_path)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("patch applied to the wrong base archive")
+
+def test_patch_round_trip(tmp_path):
+    run_patches(0, 60, tmp_path)
+
+def test_corrupt_patch(tmp_path):
+    old_path = str(tmp_path / 'old.brarchive')
+    new_path = str(tmp_path / 'new.brarchive')
+    patch_path = str(tmp_path / 'update.patch')
+    out_path = str(tmp_path / 'patched.brarchive')
+    rng = random.Random(1)
+    files = random_files(rng, 4, 300)
+    with open(old_path, 'wb') as f:
+        f.write(encode_brarchive(files))
+    files['f000'] = b'changed'
+    files['added'] = rng.randbytes(200)
+    with open(new_path, 'wb') as f:
+        f.write(encode_brarchive(files))
+    with open(patch_path, 'wb') as f:
+        make_patch(old_path, new_path, f)
+    with open(patch_path, 'rb') as f:
+        patch = f.read()
+    with open(old_path, 'rb') as f:
+        old = f.read()
+    with open(new_path, 'rb') as f:
+        new = f.read()
+
+    def check(data, output, may_apply=False):
+        with open(patch_path, 'wb') as f:
+            f.write(data)
+        try:
+            apply_patch(old_path, patch_path, output)
+        except ValueError:
+            # 출력(제자리 적용이면 이전 아카이브)은 그대로, 임시 파일도 남지 않음
+            assert not os.path.exists(out_path)
+            with open(old_path, 'rb') as f:
+                assert f.read() == old
+            assert sorted(os.listdir(tmp_path)) == ['new.brarchive', 'old.brarchive', 'update.patch']
+            return
+        # 최종 다이제스트가 맞으면 결과도 정확해야 함 (0 패딩을 가리키는 deflate 역참조,
+        # 같은 내용의 다른 구간을 가리키는 COPY 등은 변조돼도 같은 결과를 만듦)
+        assert may_apply
+        with open(output, 'rb') as f:
+            assert f.read() == new
+        if output == old_path:
+            with open(old_path, 'wb') as f:
+                f.write(old)
+        else:
+            os.unlink(output)
+
+    # 모든 위치의 1바이트 변조, 모든 길이로 잘린 패치, 뒤에 붙은 데이터
+    for pos in range(len(patch)):
+        flipped = bytearray(patch)
+        flipped[pos] ^= 0x40
+        check(bytes(flipped), out_path if pos % 2 else old_path, may_apply=True)
+    for size in range(len(patch)):
+        check(patch[:size], out_path)
+    check(patch + b'\0', out_path)
+    check(patch + b'\0', old_path)
+
+def main(argv):
+    seed = int(argv[0]) if argv else random.randrange(1 << 32)
+    trials = int(argv[1]) if len(argv) > 1 else 300
+    with tempfile.TemporaryDirectory() as directory:
+        run_patches(seed, trials, directory)
+    print(f"ok (seed {seed}, {trials} trials)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+validate()와 validate 명령 검사
+
+구조 문제(범위 밖, 겹침, 틈, 잘린 테이블)를 찾는지와, 명령줄에서 읽을 수 없는
+파일이 있어도 나머지 아카이브를 끝까지 검사하고 종료 코드 1을 반환하는지 확인한다.
+"""
+import struct
+
+from brarchive import HEADER_SIZE, DESCRIPTOR_SIZE, ENTRY_NAME_LEN_MAX, encode_brarchive, main, validate
+
+
+def set_span(data, i, offset, length):
+    """i번째 디스크립터의 (오프셋, 길이)를 바꾼 아카이브"""
+    data = bytearray(data)
+    struct.pack_into('<II', data, HEADER_SIZE + i * DESCRIPTOR_SIZE + 1 + ENTRY_NAME_LEN_MAX, offset, length)
+    return bytes(data)
+
+def kinds(data):
+    return sorted({kind for kind, _, _ in validate(data)})
+
+def test_problems():
+    data = encode_brarchive({'a': b'1234', 'b': b'5678'})
+    assert validate(data) == []
+    assert kinds(set_span(data, 1, 100, 4)) == ['gap', 'out_of_range']
+    assert kinds(set_span(data, 1, 2, 4)) == ['gap', 'overlap']
+    assert kinds(data[:HEADER_SIZE + DESCRIPTOR_SIZE]) == ['table']
+    assert kinds(b'not an archive') == ['header']
+
+def test_cli_continues_after_unreadable_files(tmp_path, capsys):
+    good = tmp_path / 'good.brarchive'
+    good.write_bytes(encode_brarchive({'a': b'1234'}))
+    bad = tmp_path / 'bad.brarchive'
+    bad.write_bytes(set_span(good.read_bytes(), 0, 100, 4))
+    missing = tmp_path / 'missing.brarchive'
+
+    assert main(['validate', str(missing), str(tmp_path), str(bad), str(good)]) == 1
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith(f"FAIL {missing}: ")
+    assert lines[1].startswith(f"FAIL {tmp_path}: ")
+    assert lines[2].startswith(f"FAIL {bad}: ")
+    assert lines[-1] == f"ok   {good}"
+
+    assert main(['validate', str(good)]) == 0
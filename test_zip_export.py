@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+write_zip 출력 검사
+
+병렬 압축(_zip_write_raw가 ZipFile 내부 상태를 직접 다룸)과 스트리밍 경로 모두
+zipfile로 다시 읽어 CRC(testzip)와 엔트리 내용, 로컬 헤더 배치를 확인한다.
+탐색할 수 없는 출력 스트림과 리더 입력도 포함한다.
+"""
+import io
+import random
+import struct
+import zipfile
+
+import brarchive
+from brarchive import BRArchiveReader, encode_brarchive, write_zip
+
+
+class Unseekable(io.RawIOBase):
+    """쓰기만 되고 seek/tell이 안 되는 스트림 (HTTP 응답 등)"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+
+def sample_files():
+    rng = random.Random(0)
+    files = {
+        'manifest.json': b'{"format_version": 2}' * 50,
+        'texts/en_US.lang': b'item.name=Stone\n' * 2000,
+        'textures/stone.png': rng.randbytes(5000),
+        'sounds/step.ogg': rng.randbytes(3000),
+        'empty.txt': b'',
+        '한글/이름.txt': '가나다'.encode('utf-8') * 100,
+    }
+    for i in range(40):
+        files[f'data/{i:02d}.bin'] = rng.randbytes(rng.randint(0, 2000)) * rng.randint(1, 4)
+    return files
+
+def check_layout(data, infos):
+    """로컬 헤더의 크기 필드대로 엔트리가 빈틈없이 이어지는지 (zipfile은 file_size만큼만 읽으므로 따로 확인)"""
+    pos = 0
+    for info in sorted(infos, key=lambda info: info.header_offset):
+        assert info.header_offset == pos
+        signature, flags, crc, compress_size, file_size, name_len, extra_len = \
+            struct.unpack_from('<4s2xH6xIIIHH', data, pos)
+        assert signature == b'PK\x03\x04'
+        pos += 30 + name_len + extra_len + info.compress_size
+        if flags & 0x08:
+            # 크기를 모르고 쓴 엔트리(스트리밍 + 탐색 불가)는 뒤따르는 데이터 디스크립터에 기록
+            signature, crc, compress_size, file_size = struct.unpack_from('<4sIII', data, pos)
+            assert signature == b'PK\x07\x08'
+            pos += 16
+        assert (crc, compress_size, file_size) == (info.CRC, info.compress_size, info.file_size)
+    assert data[pos:pos + 4] == b'PK\x01\x02'
+
+def check_zip(data, files):
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == list(files)
+        check_layout(data, zf.infolist())
+        for name, contents in files.items():
+            assert zf.read(name) == contents
+            info = zf.getinfo(name)
+            assert info.compress_type == (brarchive.zip_compress_type(name) if contents else zipfile.ZIP_STORED)
+
+def export(archive, seekable, **kwargs):
+    if seekable:
+        out = io.BytesIO()
+        write_zip(archive, out, **kwargs)
+        return out.getvalue()
+    out = Unseekable()
+    write_zip(archive, out, **kwargs)
+    return bytes(out.buffer)
+
+def test_parallel(monkeypatch):
+    files = sample_files()
+    for seekable in (True, False):
+        for workers in (1, 4):
+            check_zip(export(files, seekable, workers=workers), files)
+    # 대기 크기 상한에 자주 걸리도록 줄여도 순서와 내용이 같아야 함
+    monkeypatch.setattr(brarchive, 'ZIP_PARALLEL_MAX_PENDING', 4096)
+    check_zip(export(files, True, workers=4), files)
+
+def test_streaming(monkeypatch):
+    # 모든 비어 있지 않은 엔트리가 스트리밍 경로를 타고, 병렬 경로와 섞이도록
+    monkeypatch.setattr(brarchive, 'ZIP_PARALLEL_MAX_ENTRY', 1000)
+    files = sample_files()
+    for seekable in (True, False):
+        check_zip(export(files, seekable, workers=4, chunk_size=777), files)
+
+def test_reader_input():
+    files = sample_files()
+    with BRArchiveReader(encode_brarchive(files)) as reader:
+        data = export(reader, False, level=9, workers=2)
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        assert {name: zf.read(name) for name in zf.namelist()} == files